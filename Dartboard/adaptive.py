@@ -0,0 +1,170 @@
+# Adaptive-resolution expected-score maps.
+#
+# A uniform grid spends most of its points on the flat area off the board, and gives the
+# triple and double rings, where the interesting maxima are, no more detail than anywhere
+# else. Here the map is a quadtree of tiles instead: every tile holds (tile + 1) x (tile + 1)
+# evenly spaced values (its corners and edges included), and a tile is split into four
+# children at twice the resolution wherever bilinear interpolation from every other value
+# misses the rest by more than 'threshold' points. Values come from scoring.RayIntegral, so
+# any point can be evaluated directly and there's no sampling noise to trigger refinement.
+#
+# The tree is saved as a .npz pyramid, one array of tiles per level, and sample() turns it
+# back into an ordinary array (in gen_array.c's layout) at any size, which is how
+# image_from_npy.py and contours.py read .npz files.
+
+import numpy as np
+from scipy.ndimage import map_coordinates
+
+from scoring import RayIntegral
+
+
+class Pyramid:
+    def __init__(self, x_c=0.0, y_c=0.0, half=1.5, tile=16, sigma=None):
+        # Covers [x_c - half, x_c + half] x [y_c - half, y_c + half]
+        self.x_c = x_c
+        self.y_c = y_c
+        self.half = half
+        self.tile = tile
+        self.sigma = sigma
+        self.levels = []  # levels[L]: (index, tiles), index (n, 2) of (row, col), tiles (n, tile + 1, tile + 1)
+        self.evaluated = 0
+
+    def nodes(self, level, index):
+        # (y, x) coordinates of the values of the tiles at 'index' on 'level'
+        edge = 2 * self.half / 2 ** level
+        offsets = np.arange(self.tile + 1) * edge / self.tile
+        y = self.y_c - self.half + edge * index[:, 0, None, None] + offsets[None, :, None]
+        x = self.x_c - self.half + edge * index[:, 1, None, None] + offsets[None, None, :]
+        return np.broadcast_arrays(y, x)
+
+    @staticmethod
+    def detail(tiles):
+        # Largest difference, per tile, between its values and the bilinear interpolation
+        # of every other one of them
+        coarse = tiles[:, ::2, ::2]
+        fine = np.empty_like(tiles)
+        fine[:, ::2, ::2] = coarse
+        fine[:, 1::2, ::2] = (coarse[:, :-1] + coarse[:, 1:]) / 2
+        fine[:, :, 1::2] = (fine[:, :, :-1:2] + fine[:, :, 2::2]) / 2
+        return np.abs(tiles - fine).max(axis=(1, 2))
+
+    def build(self, evaluate, max_level=6, threshold=0.05):
+        # 'evaluate(x, y)' gives the expected score at arrays of points
+        if self.tile % 2:
+            raise ValueError("tile must be even")
+
+        index = np.zeros((1, 2), dtype=np.intp)
+        self.levels = []
+
+        for level in range(max_level + 1):
+            y, x = self.nodes(level, index)
+            tiles = evaluate(x, y)
+            self.evaluated += tiles.size
+            self.levels.append((index, tiles))
+
+            if level == max_level:
+                break
+
+            split = index[self.detail(tiles) > threshold]
+            if len(split) == 0:
+                break
+
+            children = np.array([(0, 0), (0, 1), (1, 0), (1, 1)])
+            index = (2 * split[:, None, :] + children[None, :, :]).reshape(-1, 2)
+
+        return self
+
+    @property
+    def full_size(self):
+        # Size of the uniform grid matching the finest level
+        return self.tile * 2 ** (len(self.levels) - 1)
+
+    def sample(self, size=None):
+        # The map as a (size, size) array laid out like gen_array.c's output (row i at
+        # y = y_c - half + i * step, column j at x = x_c - half + j * step), each pixel
+        # interpolated from the finest tile covering it
+        if size is None:
+            size = self.full_size
+
+        step = 2 * self.half / size
+        out = np.empty((size, size))
+
+        for level, (index, tiles) in enumerate(self.levels):
+            edge = 2 * self.half / 2 ** level
+
+            for (row, col), values in zip(index, tiles):
+                # output pixels whose points fall within this tile
+                i0, i1 = int(np.ceil(row * edge / step - 1e-9)), int(np.ceil((row + 1) * edge / step - 1e-9))
+                j0, j1 = int(np.ceil(col * edge / step - 1e-9)), int(np.ceil((col + 1) * edge / step - 1e-9))
+                i1, j1 = min(i1, size), min(j1, size)
+                if i0 >= i1 or j0 >= j1:
+                    continue
+
+                u = (np.arange(i0, i1) * step - row * edge) / edge * self.tile
+                v = (np.arange(j0, j1) * step - col * edge) / edge * self.tile
+                uu, vv = np.meshgrid(u, v, indexing="ij")
+                out[i0:i1, j0:j1] = map_coordinates(values, [uu, vv], order=1, mode="nearest")
+
+        return out
+
+    def save(self, path):
+        arrays = {"meta": np.array([self.x_c, self.y_c, self.half, self.tile, np.nan if self.sigma is None else self.sigma])}
+        for level, (index, tiles) in enumerate(self.levels):
+            arrays[f"index{level}"] = index
+            arrays[f"tiles{level}"] = tiles
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            x_c, y_c, half, tile, sigma = data["meta"]
+            pyramid = cls(x_c, y_c, half, int(tile), None if np.isnan(sigma) else sigma)
+
+            level = 0
+            while f"index{level}" in data:
+                pyramid.levels.append((data[f"index{level}"], data[f"tiles{level}"]))
+                level += 1
+
+        return pyramid
+
+
+def build(sigma, x_c=0.0, y_c=0.0, half=1.5, tile=16, max_level=6, threshold=0.05, order=8):
+    # 'order' rays per slice; 8 is plenty for sigma 0.1 and up, raise it for smaller sigmas
+    integral = RayIntegral(order)
+    pyramid = Pyramid(x_c, y_c, half, tile, sigma)
+    return pyramid.build(lambda x, y: integral(x, y, sigma), max_level, threshold)
+
+
+def load(path, size=None):
+    # A .npy map as it is, or a .npz pyramid sampled at 'size' (its finest resolution by
+    # default)
+    if str(path).endswith(".npz"):
+        return Pyramid.load(path).sample(size)
+    return np.load(path)
+
+
+if __name__ == "__main__":
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("outfp", help=".npz file to write")
+    parser.add_argument("sigma", type=float)
+    parser.add_argument("--center", type=float, nargs=2, default=[0.0, 0.0], metavar=("X_C", "Y_C"))
+    parser.add_argument("--half", type=float, default=1.5, help="half the width of the area covered")
+    parser.add_argument("--tile", type=int, default=16)
+    parser.add_argument("--levels", type=int, default=6, help="most times a tile may be split")
+    parser.add_argument("--threshold", type=float, default=0.05, help="interpolation error (points) that splits a tile")
+    parser.add_argument("--order", type=int, default=8, help="integration rays per slice of the board")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pyramid = build(args.sigma, *args.center, args.half, args.tile, args.levels, args.threshold, args.order)
+    pyramid.save(args.outfp)
+
+    tiles = [len(index) for index, _ in pyramid.levels]
+    print(
+        f"{args.outfp}: tiles per level {tiles}, {pyramid.evaluated} points evaluated "
+        f"(a uniform {pyramid.full_size}x{pyramid.full_size} grid is {(pyramid.full_size + 1) ** 2}), "
+        f"{round(time.perf_counter() - start, 2)} sec"
+    )
@@ -7,10 +7,15 @@ from scipy.ndimage import gaussian_filter
 
 plt.rcParams["contour.negative_linestyle"] = "solid"
 
-# Command line args: input filepath, output filepath, contour interval
-assert len(sys.argv) == 4
-
-Z = np.load(sys.argv[1])[::-1]
+# Command line args: input filepath, output filepath, contour interval, and for adaptive.py
+# .npz pyramids, optionally the size to sample them at
+assert len(sys.argv) in (4, 5)
+
+if sys.argv[1].endswith(".npz"):
+    from adaptive import load
+    Z = load(sys.argv[1], int(sys.argv[4]) if len(sys.argv) > 4 else None)[::-1]
+else:
+    Z = np.load(sys.argv[1])[::-1]
 interval = float(sys.argv[3])
 
 Z = gaussian_filter(Z, 10)
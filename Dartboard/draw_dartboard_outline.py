@@ -2,6 +2,7 @@
 
 # ffmpeg to layer A.png on top of B.png:
 # ffmpeg -i B.png -i A.png -filter_complex "[1]scale=iw/2:-1[b];[0:v][b] overlay" out.png
+# (overlay.py draws the same outline at any size and overlays a whole directory of images)
 
 from math import pi, sin, cos
 import cairo
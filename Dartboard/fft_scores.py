@@ -0,0 +1,137 @@
+# Python alternative to gen_array.c. Instead of averaging random throws for every pixel,
+# the score function is rasterized once and convolved with the throw distribution: the
+# expected score when aiming at p is the integral of score(p + s) times the normal density
+# of s, i.e. the score field blurred by a Gaussian of standard deviation sigma. The blur is
+# a multiplication in the frequency domain, so the result is exact up to the raster's
+# resolution (no sampling noise), and the field's FFT can be reused for every sigma.
+#
+# Takes the same arguments as gen_array.out, and writes the same .npy layout, so the output
+# can go straight to contours.py and image_from_npy.py. The statistical count is accepted
+# for compatibility, and ignored.
+
+import numpy as np
+from scipy import fft
+
+from scoring import score
+
+
+class ScoreField:
+    # The score function rasterized on gen_array.c's output grid, plus a margin of 6 *
+    # max_sigma on every side, so that blurring near the edges of the output only ever
+    # reads real raster (the Gaussian beyond 6 sigma is negligible), never the wrapped-
+    # around other side of the FFT.
+
+    def __init__(self, resolution=250, x_px=500, y_px=500, x_c=0.0, y_c=0.0, max_sigma=0.4, supersample=4):
+        self.step = 1.0 / resolution
+        self.x_px = x_px
+        self.y_px = y_px
+        self.xmin = x_c - self.step * x_px / 2
+        self.ymin = y_c - self.step * y_px / 2
+        self.max_sigma = max_sigma
+
+        # gen_array.c computes y from index / y_px, and x from index % x_px, so these are
+        # the rows and columns it actually visits (x_px of each for a square image)
+        self.rows = (x_px * y_px - 1) // y_px + 1
+        self.cols = x_px
+
+        self.pad = int(np.ceil(6 * max_sigma / self.step))
+        self.shape = tuple(fft.next_fast_len(n + 2 * self.pad, real=True) for n in (self.rows, self.cols))
+        self.raster = self.rasterize(supersample)
+        self._spectrum = None
+
+    def coords(self, n, start):
+        # Coordinates of the raster cells along one axis, lined up with the output pixels
+        return self.step * np.arange(-self.pad, n - self.pad) + start
+
+    def rasterize(self, supersample):
+        # Average score over each raster cell. Only the cells within the board's bounding
+        # box are computed, and only the ones on a region boundary are supersampled (with
+        # supersample x supersample points); everywhere else the score is constant.
+        ys = self.coords(self.shape[0], self.ymin)
+        xs = self.coords(self.shape[1], self.xmin)
+        raster = np.zeros(self.shape)
+
+        rows = np.flatnonzero(np.abs(ys) <= 1 + self.step)
+        cols = np.flatnonzero(np.abs(xs) <= 1 + self.step)
+        if len(rows) == 0 or len(cols) == 0:
+            return raster
+
+        y, x = np.meshgrid(ys[rows], xs[cols], indexing="ij")
+        board = score(x, y).astype(np.float64)
+
+        edge = np.zeros(board.shape, dtype=bool)
+        edge[1:] |= board[1:] != board[:-1]
+        edge[:-1] |= board[1:] != board[:-1]
+        edge[:, 1:] |= board[:, 1:] != board[:, :-1]
+        edge[:, :-1] |= board[:, 1:] != board[:, :-1]
+
+        if supersample > 1:
+            offsets = self.step * ((np.arange(supersample) + 0.5) / supersample - 0.5)
+            oy, ox = (a.ravel() for a in np.meshgrid(offsets, offsets, indexing="ij"))
+            board[edge] = score(x[edge][:, None] + ox, y[edge][:, None] + oy).mean(axis=1)
+
+        raster[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1] = board
+        return raster
+
+    @property
+    def spectrum(self):
+        # FFT of the raster, computed on first use
+        if self._spectrum is None:
+            self._spectrum = fft.rfft2(self.raster, workers=-1)
+        return self._spectrum
+
+    def transfer(self, sigma):
+        # Fourier transform of the Gaussian, on the rfft2 frequency grid. It separates into
+        # a column times a row, which is much cheaper than exp() over the whole grid.
+        fy = fft.fftfreq(self.shape[0], d=self.step)
+        fx = fft.rfftfreq(self.shape[1], d=self.step)
+        a = 2 * (np.pi * sigma) ** 2
+        return np.exp(-a * fy ** 2)[:, None] * np.exp(-a * fx ** 2)[None, :]
+
+    def expected(self, sigma):
+        # Expected score for every output pixel, in gen_array.c's layout
+        if sigma > self.max_sigma:
+            raise ValueError(f"sigma {sigma} is larger than the field's margin allows ({self.max_sigma})")
+
+        if sigma == 0:
+            ys = self.step * np.arange(self.rows) + self.ymin
+            xs = self.step * np.arange(self.cols) + self.xmin
+            blurred = score(xs[None, :], ys[:, None]).astype(np.float64)
+        else:
+            blurred = fft.irfft2(self.spectrum * self.transfer(sigma), s=self.shape, workers=-1)
+            blurred = blurred[self.pad:self.pad + self.rows, self.pad:self.pad + self.cols]
+
+        return self.layout(blurred)
+
+    def layout(self, blurred):
+        # Arrange (rows, cols) values the way gen_array.c writes them: entry k of the
+        # (x_px, y_px) array is the point in row k / y_px, column k % x_px
+        if self.x_px == self.y_px:
+            return np.ascontiguousarray(blurred)
+
+        k = np.arange(self.x_px * self.y_px)
+        return blurred[k // self.y_px, k % self.x_px].reshape(self.x_px, self.y_px)
+
+
+def expected_scores(sigma=0.4, resolution=250, x_px=500, y_px=500, x_c=0.0, y_c=0.0):
+    return ScoreField(resolution, x_px, y_px, x_c, y_c, max_sigma=sigma).expected(sigma)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Same arguments as gen_array.out:
+    # output filepath (required); sigma (default 0.4); resolution (px/unit) (default 250); statistical count (ignored);
+    # horizontal resolution (px) (default 500); vertical resolution (px) (default 500); x-center (default 0); y-center (default 0)
+    argv = sys.argv
+    sigma      = float(argv[2]) if len(argv) > 2 else 0.4
+    resolution = int(argv[3]) if len(argv) > 3 else 250
+    x_px       = int(argv[5]) if len(argv) > 5 else 500
+    y_px       = int(argv[6]) if len(argv) > 6 else 500
+    x_c        = float(argv[7]) if len(argv) > 7 else 0.0
+    y_c        = float(argv[8]) if len(argv) > 8 else 0.0
+
+    step = 1.0 / resolution
+    print(f"file: {argv[1]}; sigma: {sigma:f}; px/unit: {resolution}; step: {step:f}; x_px: {x_px}; y_px: {y_px}; center: ({x_c:f}, {y_c:f})")
+
+    np.save(argv[1], expected_scores(sigma, resolution, x_px, y_px, x_c, y_c))
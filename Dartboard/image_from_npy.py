@@ -1,28 +1,66 @@
 # Script to generate an image from the dartboard data, using the "Magma" colormap
 
+import os
 import numpy as np
-from math import floor
-from matplotlib import cm
 from PIL import Image
 
+try:
+    from matplotlib import colormaps
+    magma = colormaps["magma"]
+except ImportError: # matplotlib < 3.5
+    from matplotlib import cm
+    magma = cm.get_cmap("magma")
 
-magma = cm.get_cmap("magma")
-cmap = [np.array([min(255, floor(256 * rgba)) for rgba in magma(i)], dtype=np.uint8) for i in range(256)]
 
+# 256-entry RGBA lookup table: row i is the color for values in [i / 256, (i + 1) / 256)
+cmap = np.minimum(255, np.floor(256 * magma(np.arange(256)))).astype(np.uint8)
 
-def gen_img(infp, outfp=None, resize=None):
-    ary = np.load(infp)[::-1]
-    ary /= np.max(ary)
 
-    new = np.empty(ary.shape + (4,), np.uint8)
+def colorize(ary, low=0.0, high=None):
+    # Normalize [low, high] (by default 0 to the array's maximum) to [0, 1], quantize to 256
+    # bins, and look every bin up in the colormap in a single gather. Returns a new
+    # (rows, cols, 4) uint8 array.
+    if high is None:
+        high = np.max(ary)
+    bins = np.floor(256 * ((ary - low) / (high - low)))
+    np.clip(bins, 0, 255, out=bins)
+    return cmap[bins.astype(np.uint8)]
 
-    for r in range(ary.shape[0]):
-        for c in range(ary.shape[1]):
-            new[r][c] = cmap[min(255, floor(256 * ary[r][c]))]
+
+def downsample(ary, factor):
+    # Average each factor x factor block (dropping any partial blocks at the edges)
+    rows, cols = ary.shape[0] // factor, ary.shape[1] // factor
+    return ary[:rows * factor, :cols * factor].reshape(rows, factor, cols, factor).mean(axis=(1, 3))
+
+
+def load(infp, size=None):
+    # A .npy array, or an adaptive.py .npz pyramid sampled at 'size' x 'size' pixels
+    if infp.endswith(".npz"):
+        from adaptive import load
+        return load(infp, size)
+    return np.load(infp)
+
+
+def gen_img(infp, outfp=None, resize=None, downscale=None, size=None):
+    # 'downscale' averages the data in blocks of that many pixels before coloring, which is
+    # much cheaper than coloring at full size and shrinking the image with 'resize'. 'size'
+    # is the resolution to sample .npz pyramids at.
+    if isinstance(size, str):
+        size = int(size)
+
+    ary = load(infp, size)[::-1]
+
+    if isinstance(downscale, str):
+        downscale = int(downscale)
+
+    if downscale and downscale > 1:
+        ary = downsample(ary, downscale)
+
+    new = colorize(ary)
 
     if not outfp:
         outfp = infp[:-4] + ".png"
-    
+
     if isinstance(resize, str):
         resize = int(resize)
 
@@ -31,12 +69,26 @@ def gen_img(infp, outfp=None, resize=None):
     else:
         Image.fromarray(new).save(outfp)
 
+    return outfp
+
+
+def _gen_one(args):
+    return gen_img(*args)
 
-def process_all():
-    import os
 
-    for infp in os.listdir(r"Dartboard\data"):
-        gen_img("Dartboard\\data\\" + infp, outfp=rf"Dartboard\images\{infp[:-4]}.png")
+def process_all(data_dir=os.path.join("Dartboard", "data"), image_dir=os.path.join("Dartboard", "images"), processes=None, resize=None, downscale=None):
+    # Render every .npy (or .npz) file in 'data_dir' to a .png of the same name in
+    # 'image_dir', one file per worker process
+    from concurrent.futures import ProcessPoolExecutor
+
+    os.makedirs(image_dir, exist_ok=True)
+    jobs = [
+        (os.path.join(data_dir, infp), os.path.join(image_dir, f"{infp[:-4]}.png"), resize, downscale)
+        for infp in sorted(os.listdir(data_dir)) if infp.endswith((".npy", ".npz"))
+    ]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_gen_one, jobs))
 
 
 if __name__ == "__main__":
@@ -44,6 +96,11 @@ if __name__ == "__main__":
 
     if len(sys.argv) == 1:
         process_all()
-    
+
+    elif sys.argv[1] == "all":
+        # usage: image_from_npy.py all [data dir] [image dir] [processes] [resize] [downscale]
+        args = sys.argv[2:4] + [int(arg) if arg != "-" else None for arg in sys.argv[4:7]]
+        process_all(*args)
+
     else:
         gen_img(*sys.argv[1:])
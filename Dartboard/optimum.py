@@ -0,0 +1,208 @@
+# Find where to aim: the best points in each expected-score map, and how they move with
+# sigma.
+#
+# For each NNN.npy map (sigma = NNN / 100), the local maxima at least 'spacing' apart are
+# found, and the best 'top' are refined to sub-pixel precision by fitting a quadratic to
+# the 3x3 pixels around each. Maxima are then linked to the nearest maximum seen at a
+# smaller sigma, so each one gets a track number that follows it across the sweep (even
+# if it drops out of the top few for a while). The result
+# is a table (printed, and optionally saved as CSV) and the plot of the best expected
+# score against sigma.
+
+import os
+import re
+import csv
+from math import atan2, degrees, hypot
+
+import numpy as np
+from scipy.ndimage import maximum_filter
+
+from scoring import PI, R1, R2, R3, R4, R5, slices
+
+
+def region_name(x, y):
+    # Name of the dartboard region at (x, y), e.g. "T20", "D5", "S1", "bull"
+    r = hypot(x, y)
+    if r > 1:
+        return "off"
+    if r <= R1:
+        return "bull"
+    if r <= R2:
+        return "outer bull"
+
+    t = atan2(y, x)
+    if t < 0:
+        t += 2 * PI
+    base = slices[int((10.0 / PI) * t + 0.5)]
+
+    if R3 <= r <= R4:
+        return f"T{base}"
+    if r > R5:
+        return f"D{base}"
+    return f"S{base}"
+
+
+def refine(ary, i, j):
+    # Sub-pixel (row, col, value) of the maximum near pixel (i, j), from a least-squares
+    # quadratic fit to its 3x3 neighbourhood. Falls back to the pixel itself at the edges
+    # of the array, or if the fit doesn't have a maximum within half a pixel.
+    if not (0 < i < ary.shape[0] - 1 and 0 < j < ary.shape[1] - 1):
+        return float(i), float(j), float(ary[i, j])
+
+    z = np.asarray(ary[i - 1:i + 2, j - 1:j + 2], dtype=np.float64)
+
+    # f(u, v) = a + b u + c v + d u^2 + e u v + f v^2, with u the row offset, v the column
+    b = (z[2].sum() - z[0].sum()) / 6
+    c = (z[:, 2].sum() - z[:, 0].sum()) / 6
+    d = (z[0].sum() + z[2].sum()) / 6 - z[1].sum() / 3
+    f = (z[:, 0].sum() + z[:, 2].sum()) / 6 - z[:, 1].sum() / 3
+    e = (z[2, 2] - z[2, 0] - z[0, 2] + z[0, 0]) / 4
+
+    det = 4 * d * f - e * e
+    if det <= 0 or d >= 0:
+        return float(i), float(j), float(ary[i, j])
+
+    du = (e * c - 2 * f * b) / det
+    dv = (e * b - 2 * d * c) / det
+    if abs(du) > 0.5 or abs(dv) > 0.5:
+        return float(i), float(j), float(ary[i, j])
+
+    a = (5 * z[1, 1] + 2 * (z[0, 1] + z[2, 1] + z[1, 0] + z[1, 2]) - (z[0, 0] + z[0, 2] + z[2, 0] + z[2, 2])) / 9
+    value = a + b * du + c * dv + d * du * du + e * du * dv + f * dv * dv
+
+    return i + du, j + dv, float(value)
+
+
+def maxima(ary, top=3, spacing=50):
+    # The 'top' best local maxima of 'ary', at least 'spacing' pixels apart, as a list of
+    # (row, col, value) with sub-pixel row and col, best first
+    peaks = (ary == maximum_filter(ary, size=2 * spacing + 1, mode="nearest")) & (ary > 0)
+    rows, cols = np.nonzero(peaks)
+    order = np.argsort(ary[rows, cols])[::-1]
+
+    found = []
+    for k in order:
+        i, j = rows[k], cols[k]
+        # plateaus can give several equal pixels; keep only the first of each
+        if any(abs(i - fi) <= spacing and abs(j - fj) <= spacing for fi, fj, _ in found):
+            continue
+        found.append((i, j, None))
+        if len(found) == top:
+            break
+
+    return [refine(ary, i, j) for i, j, _ in found]
+
+
+def sigma_of(path):
+    match = re.search(r"(\d+)\.npy$", path)
+    return int(match.group(1)) / 100 if match else None
+
+
+def analyze(paths, resolution=1000, x_c=0.0, y_c=0.0, top=3, spacing=0.05, max_jump=0.1):
+    # One row per maximum per map: dicts with sigma, rank (0 = global), track, x, y, r,
+    # angle (degrees counterclockwise from the positive x axis), score and region.
+    # 'spacing' and 'max_jump' (how far a maximum may move between consecutive sigmas and
+    # keep its track) are in board units.
+    step = 1.0 / resolution
+    maps = sorted((sigma_of(path), path) for path in paths if sigma_of(path) is not None)
+
+    table = []
+    last_seen = dict()  # track: (x, y) at the largest sigma it was found so far
+    next_track = 0
+
+    for sigma, path in maps:
+        ary = np.load(path, mmap_mode="r")
+        xmin = x_c - step * ary.shape[1] / 2
+        ymin = y_c - step * ary.shape[0] / 2
+
+        current = []
+        for rank, (i, j, value) in enumerate(maxima(ary, top, max(1, round(spacing / step)))):
+            x, y = xmin + step * j, ymin + step * i
+
+            # follow the nearest unclaimed track, if close enough
+            claimed = [track for track, _, _ in current]
+            candidates = [(hypot(x - px, y - py), track) for track, (px, py) in last_seen.items() if track not in claimed]
+            distance, track = min(candidates, default=(None, None))
+
+            if track is None or distance > max_jump:
+                track = next_track
+                next_track += 1
+
+            current.append((track, x, y))
+            table.append({
+                "sigma": sigma, "rank": rank, "track": track,
+                "x": round(x, 5), "y": round(y, 5), "r": round(hypot(x, y), 5),
+                "angle": round(degrees(atan2(y, x)) % 360, 2),
+                "score": round(value, 4), "region": region_name(x, y),
+            })
+
+        for track, x, y in current:
+            last_seen[track] = (x, y)
+
+    return table
+
+
+FIELDS = ("sigma", "rank", "track", "x", "y", "r", "angle", "score", "region")
+
+
+def print_table(table):
+    print(f"{'sigma':>6} {'rank':>4} {'track':>5} {'x':>9} {'y':>9} {'r':>8} {'angle':>7} {'score':>9}  region")
+    for row in table:
+        print(
+            f"{row['sigma']:>6.2f} {row['rank']:>4} {row['track']:>5} {row['x']:>9.5f} {row['y']:>9.5f} "
+            f"{row['r']:>8.5f} {row['angle']:>7.2f} {row['score']:>9.4f}  {row['region']}"
+        )
+
+
+def save_table(table, outfp):
+    with open(outfp, "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(table)
+
+
+def plot(table, outfp="optimal_score_plot.png"):
+    import matplotlib.pyplot as plt
+
+    best = [row for row in table if row["rank"] == 0]
+    sigmas = [row["sigma"] for row in best]
+    scores = [row["score"] for row in best]
+
+    fig, ax = plt.subplots()
+    ax.plot(sigmas, scores, color="k")
+    ax.set_xlim(0, max(sigmas))
+    ax.set_ylim(0, 60)
+    ax.set_xlabel("Standard Deviation of Throws")
+    ax.set_ylabel("Maximum Expected Score")
+    ax.grid()
+
+    fig.savefig(outfp)
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+", help="NNN.npy files, or directories of them")
+    parser.add_argument("--resolution", type=int, default=1000, help="px/unit the maps were made with")
+    parser.add_argument("--center", type=float, nargs=2, default=[0.0, 0.0], metavar=("X_C", "Y_C"))
+    parser.add_argument("--top", type=int, default=3, help="maxima to report per map")
+    parser.add_argument("--table", help="also save the table to this CSV file")
+    parser.add_argument("--plot", help="save the plot of the best score against sigma to this file")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".npy"))
+        else:
+            paths.append(path)
+
+    table = analyze(paths, args.resolution, *args.center, top=args.top)
+    print_table(table)
+
+    if args.table:
+        save_table(table, args.table)
+    if args.plot:
+        plot(table, args.plot)
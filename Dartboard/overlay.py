@@ -0,0 +1,90 @@
+# Lays the dartboard outline over heatmap images, in place of draw_dartboard_outline.py's
+# outline.png and an ffmpeg overlay for every image.
+#
+# The outline is drawn straight at the size of the image it goes on: each pixel's
+# coverage is worked out from its distance to the nearest ring or slice border, so the
+# lines are antialiased at any size, and match outline.png's (the same radii, and lines
+# 10/4000 of the board's radius wide, on a board 2/3 the width of the image). Each size
+# is drawn once and cached, and alpha-composited over every image of that size.
+
+import os
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+from scoring import PI, R1, R2, R3, R4, R5
+
+RINGS = (R1, R2, R3, R4, R5, 1.0)
+WIDTH = 10 / 4000 # line width, in board radii (as set in draw_dartboard_outline.py)
+
+
+@lru_cache(maxsize=None)
+def outline(width, height, radius=None):
+    # White RGBA outline of a board of 'radius' pixels (by default a third of the width)
+    # centered on a width x height image
+    if radius is None:
+        radius = width / 3
+
+    # pixel centers, in board units
+    x = ((np.arange(width, dtype=np.float32) + 0.5 - width / 2) / radius)[None, :]
+    y = ((height / 2 - np.arange(height, dtype=np.float32) - 0.5) / radius)[:, None]
+    r = np.hypot(x, y)
+
+    # distance to the nearest ring
+    distance = np.full(r.shape, np.inf, dtype=np.float32)
+    for ring in RINGS:
+        np.minimum(distance, np.abs(r - ring), out=distance)
+
+    # and to the nearest slice border, the lines at pi/20 + k pi/10 from R2 out to the
+    # edge of the board
+    offset = np.mod(np.arctan2(y, x) - PI / 20, PI / 10)
+    offset = np.minimum(offset, PI / 10 - offset)
+    along = r * np.cos(offset)
+    border = np.where((along >= R2) & (along <= RINGS[-1]), r * np.sin(offset), np.inf)
+    np.minimum(distance, border, out=distance)
+
+    # fraction of each pixel the line covers, in pixels
+    coverage = np.clip(WIDTH * radius / 2 + 0.5 - distance * radius, 0, 1)
+
+    rgba = np.full((height, width, 4), 255, dtype=np.uint8)
+    rgba[..., 3] = np.round(255 * coverage)
+    return Image.fromarray(rgba)
+
+
+def overlay(infp, outfp, radius=None):
+    heatmap = Image.open(infp).convert("RGBA")
+    Image.alpha_composite(heatmap, outline(*heatmap.size, radius)).save(outfp)
+    return outfp
+
+
+def overlay_all(image_dir=os.path.join("Dartboard", "output", "raw_images"), out_dir=os.path.join("Dartboard", "output", "overlaid_images"), threads=None, radius=None):
+    # Overlay every .png in 'image_dir' into a .png of the same name in 'out_dir'. Threads
+    # rather than processes, so all the images share the cached outlines (PIL and zlib
+    # release the GIL while they encode and decode, which is most of the work).
+    from concurrent.futures import ThreadPoolExecutor
+
+    os.makedirs(out_dir, exist_ok=True)
+    names = sorted(name for name in os.listdir(image_dir) if name.endswith(".png"))
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(
+            lambda name: overlay(os.path.join(image_dir, name), os.path.join(out_dir, name), radius),
+            names
+        ))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", nargs="?", default=os.path.join("Dartboard", "output", "raw_images"), help="image, or directory of images")
+    parser.add_argument("destination", nargs="?", default=os.path.join("Dartboard", "output", "overlaid_images"), help="image, or directory for the images")
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--radius", type=float, help="board radius in pixels (default: a third of the image width)")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        overlay_all(args.source, args.destination, args.threads, args.radius)
+    else:
+        overlay(args.source, args.destination, args.radius)
@@ -0,0 +1,88 @@
+# The dartboard model from gen_array.c, in NumPy: the score of a throw landing at (x, y)
+# on a dartboard of radius 1, for whole arrays of throws at once
+
+import numpy as np
+from scipy.special import erf
+
+PI = 3.141593 # the value gen_array.c uses, kept so slice boundaries land in the same place
+R1 = 0.037383
+R2 = 0.093458
+R3 = 0.55989 # alternate: 0.59813
+R4 = 0.63551
+R5 = 0.92352 # alternate: 0.96262
+
+# Slice values counterclockwise from the positive x axis; the last entry wraps around to 6
+slices = np.array([6, 13, 4, 18, 1, 20, 5, 12, 9, 14, 11, 8, 16, 7, 19, 3, 17, 2, 15, 10, 6])
+
+
+def score(x, y):
+    # Traditional dartboard score of throws at x, y (arrays of any matching shapes),
+    # exactly as score() in gen_array.c computes it
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    r = np.sqrt(x * x + y * y)
+
+    t = np.arctan2(y, x)
+    t = np.where(t < 0, t + 2 * PI, t)
+    base = slices[((10.0 / PI) * t + 0.5).astype(np.intp)]
+
+    return np.select(
+        [r > 1, r <= R1, r <= R2, r < R3, r <= R4, r <= R5],
+        [0, 50, 25, base, 3 * base, base],
+        2 * base
+    )
+
+
+class RayIntegral:
+    # Expected score of aiming at any point, integrating the throw distribution along rays
+    # from the center of the board. Along a ray at angle t, aiming at p, the density is
+    # exp(-((r - a)^2 + b^2) / (2 sigma^2)) with a = p . (cos t, sin t) and b its
+    # perpendicular distance, so the integral of r times that over each ring has a closed
+    # form (in exp and erf) and the radial part is exact. Only the angle is left to
+    # quadrature, with 'order' Gauss-Legendre rays per slice; the integrand is smooth
+    # within a slice, so the error falls off quickly with the order (under 1e-6 against
+    # order 64 at sigma 0.05 or more with the default).
+
+    def __init__(self, order=16):
+        u, w = np.polynomial.legendre.leggauss(order)
+        self.radii = np.array([0.0, R1, R2, R3, R4, R5, 1.0])
+        t, weights, coefficients = [], [], []
+
+        for k in range(20):
+            t0, t1 = (k - 0.5) * PI / 10, (k + 0.5) * PI / 10
+            t.append((t1 - t0) / 2 * u + (t1 + t0) / 2)
+            weights.append((t1 - t0) / 2 * w)
+
+            # the sum over rings of value * (F(outer) - F(inner)) is the sum over radii of
+            # F(radius) * (value inside - value outside)
+            base = int(slices[k])
+            values = np.array([0, 50, 25, base, 3 * base, base, 2 * base, 0])
+            coefficients.append(np.repeat((values[:-1] - values[1:])[None, :], order, axis=0))
+
+        t = np.concatenate(t)
+        self.cos, self.sin = np.cos(t), np.sin(t)
+        self.weights = np.concatenate(weights)
+        self.coefficients = np.concatenate(coefficients)  # (rays, radii)
+
+    def __call__(self, x, y, sigma, chunk=256):
+        # Expected score aiming at x, y (arrays of matching shapes)
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        px, py = x.ravel(), y.ravel()
+        out = np.empty(px.shape)
+
+        for start in range(0, len(px), chunk):
+            cx, cy = px[start:start + chunk, None], py[start:start + chunk, None]
+            a = cx * self.cos + cy * self.sin  # (points, rays)
+            b2 = np.maximum(cx * cx + cy * cy - a * a, 0)
+
+            # F(R) = integral of r exp(-(r - a)^2 / (2 sigma^2)) dr, up to a constant
+            z = self.radii[None, None, :] - a[:, :, None]
+            F = -sigma * sigma * np.exp(-z * z / (2 * sigma * sigma)) + \
+                a[:, :, None] * sigma * np.sqrt(np.pi / 2) * erf(z / (sigma * np.sqrt(2)))
+
+            along = np.einsum("prj,rj->pr", F, self.coefficients)
+            out[start:start + chunk] = (np.exp(-b2 / (2 * sigma * sigma)) * along) @ self.weights
+
+        return (out / (2 * np.pi * sigma * sigma)).reshape(x.shape)
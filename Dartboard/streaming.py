@@ -0,0 +1,185 @@
+# Bounded-memory versions of image_from_npy.py and contours.py, for maps too large to hold
+# in memory a few times over (a 3000x3000 float64 map is 72 MB, and those scripts make
+# several full-size copies of it).
+#
+# The .npy file is memory-mapped rather than loaded, and processed a block of rows at a
+# time: each block is read with enough rows on either side for the Gaussian filter (so the
+# result is the same as filtering the whole array), colored, and appended to the PNG, which
+# is written with zlib directly since PIL can only save a whole image at once. Anything
+# that depends on the whole map (its maximum, say) is found in a first pass over the same
+# blocks. Peak memory is a few blocks, whatever the size of the map.
+#
+# The contour image is drawn in the same way, without matplotlib: a pixel is on a contour
+# line if its neighbours fall in a different interval of the contour spacing, which gives
+# lines about two pixels wide, where contours.py's are antialiased.
+
+import zlib
+import struct
+
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+from image_from_npy import colorize, downsample
+
+TRUNCATE = 4.0 # gaussian_filter's default: the kernel reaches TRUNCATE * sigma pixels out
+
+
+class PNGWriter:
+    # Writes an RGBA PNG a block of rows at a time
+
+    def __init__(self, path, width, height):
+        self.file = open(path, "wb")
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self.compressor = zlib.compressobj(6)
+
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        # 8 bits per channel, color type 6 (RGBA), default compression, filtering and no interlacing
+        self.chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+
+    def chunk(self, kind, data):
+        self.file.write(struct.pack(">I", len(data)) + kind + data)
+        self.file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+    def write(self, rgba):
+        # Append (rows, width, 4) uint8 rows, each prefixed with filter type 0 (none)
+        rows = np.empty((rgba.shape[0], 1 + 4 * self.width), dtype=np.uint8)
+        rows[:, 0] = 0
+        rows[:, 1:] = rgba.reshape(rgba.shape[0], -1)
+        self.rows += rgba.shape[0]
+
+        data = self.compressor.compress(rows.tobytes())
+        if data:
+            self.chunk(b"IDAT", data)
+
+    def close(self):
+        if self.rows != self.height:
+            raise ValueError(f"wrote {self.rows} rows of a {self.height}-row image")
+        self.chunk(b"IDAT", self.compressor.flush())
+        self.chunk(b"IEND", b"")
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        if kind is None:
+            self.close()
+        else:
+            self.file.close()
+
+
+def open_map(infp):
+    # The map memory-mapped, flipped the way the images show it (a view, not a copy)
+    return np.load(infp, mmap_mode="r")[::-1]
+
+
+def row_blocks(rows, block, halo=0):
+    # (start, stop, lo, hi) for every 'block' rows: rows [start, stop) of the output need
+    # rows [lo, hi) of the input, 'halo' more on each side where there are any
+    for start in range(0, rows, block):
+        stop = min(start + block, rows)
+        yield start, stop, max(0, start - halo), min(rows, stop + halo)
+
+
+def filtered(ary, sigma, block, extra=0):
+    # gaussian_filter(ary, sigma) a block at a time, as (start, stop, values), where values
+    # also has up to 'extra' rows either side of [start, stop) (fewer at the edges)
+    halo = int(TRUNCATE * sigma + 0.5) + extra
+
+    for start, stop, lo, hi in row_blocks(ary.shape[0], block, halo):
+        values = gaussian_filter(np.asarray(ary[lo:hi], dtype=np.float64), sigma, truncate=TRUNCATE)
+        yield start, stop, values[max(0, start - extra) - lo:min(ary.shape[0], stop + extra) - lo]
+
+
+def downsampled(ary, factor, block):
+    # downsample(ary, factor) a block at a time, as (start, stop, values)
+    rows = ary.shape[0] // factor
+    for start, stop, _, _ in row_blocks(rows, block):
+        yield start, stop, downsample(np.asarray(ary[start * factor:stop * factor], dtype=np.float64), factor)
+
+
+def gen_img(infp, outfp=None, downscale=None, block=256):
+    # Same image as image_from_npy.gen_img(infp, outfp, downscale=downscale)
+    ary = open_map(infp)
+    factor = int(downscale) if downscale and int(downscale) > 1 else 1
+    block = int(block)
+
+    high = max(np.max(values) for _, _, values in downsampled(ary, factor, block))
+
+    if not outfp:
+        outfp = infp[:-4] + ".png"
+
+    with PNGWriter(outfp, ary.shape[1] // factor, ary.shape[0] // factor) as png:
+        for _, _, values in downsampled(ary, factor, block):
+            png.write(colorize(values, 0.0, high))
+
+    return outfp
+
+
+def contour_lines(levels):
+    # Pixels whose level differs from a neighbour's, for 'levels' with one row of context
+    # above and below (the rows returned are the ones in between)
+    middle = levels[1:-1]
+    edge = np.zeros(middle.shape, dtype=bool)
+    edge |= middle != levels[:-2]
+    edge |= middle != levels[2:]
+    edge[:, 1:] |= middle[:, 1:] != middle[:, :-1]
+    edge[:, :-1] |= middle[:, 1:] != middle[:, :-1]
+    return edge
+
+
+def contours(infp, outfp, interval, sigma=10, block=256):
+    # The image contours.py draws: the map smoothed with a Gaussian, colored from its
+    # minimum to its maximum, with white lines every 'interval' points
+    ary = open_map(infp)
+    interval = float(interval)
+    block = int(block)
+
+    low, high = np.inf, -np.inf
+    for _, _, values in filtered(ary, sigma, block):
+        low, high = min(low, np.min(values)), max(high, np.max(values))
+
+    with PNGWriter(outfp, ary.shape[1], ary.shape[0]) as png:
+        for start, stop, values in filtered(ary, sigma, block, extra=1):
+            # pad with copies of the first and last rows of the map, which have no neighbours there
+            if start == 0:
+                values = np.concatenate([values[:1], values])
+            if stop == ary.shape[0]:
+                values = np.concatenate([values, values[-1:]])
+
+            rgba = colorize(values[1:-1], low, high)
+            # contours.py's levels start at 'interval', so nothing below that is a line
+            rgba[contour_lines(np.maximum(0, np.floor(values / interval)))] = 255
+            png.write(rgba)
+
+    return outfp
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    image = commands.add_parser("image", help="as image_from_npy.py")
+    image.add_argument("infp")
+    image.add_argument("outfp", nargs="?")
+    image.add_argument("--downscale", type=int)
+
+    contour = commands.add_parser("contours", help="as contours.py")
+    contour.add_argument("infp")
+    contour.add_argument("outfp")
+    contour.add_argument("interval", type=float)
+    contour.add_argument("--sigma", type=float, default=10, help="smoothing, in pixels")
+
+    for command in (image, contour):
+        command.add_argument("--block", type=int, default=256, help="rows processed at a time")
+
+    args = parser.parse_args()
+
+    if args.command == "image":
+        gen_img(args.infp, args.outfp, args.downscale, args.block)
+    else:
+        contours(args.infp, args.outfp, args.interval, args.sigma, args.block)
@@ -0,0 +1,54 @@
+# Expected-score maps for a whole range of sigmas in one process, replacing the overnight
+# multiprocess.py run of one gen_array.out per sigma.
+#
+# The score field is rasterized and Fourier transformed once (see fft_scores.py), with a
+# margin wide enough for the largest sigma; each map is then one multiplication by that
+# sigma's Gaussian and an inverse FFT. Each NNN.npy (100 * sigma) is written as soon as it
+# is done.
+
+import os
+import time
+
+import numpy as np
+
+from fft_scores import ScoreField
+
+
+SIGMAS = [i / 100 for i in range(11, 26)] # as in multiprocess.py
+
+
+def sweep(sigmas=SIGMAS, directory=".", resolution=1000, x_px=3000, y_px=3000, x_c=0.0, y_c=0.0, verbose=True):
+    # Returns the list of files written
+    start = time.perf_counter()
+    field = ScoreField(resolution, x_px, y_px, x_c, y_c, max_sigma=max(sigmas))
+    field.spectrum
+
+    if verbose:
+        print(f"score field {field.shape[0]}x{field.shape[1]} ready in {round(time.perf_counter() - start, 2)} sec")
+
+    os.makedirs(directory, exist_ok=True)
+    written = []
+
+    for sigma in sigmas:
+        outfp = os.path.join(directory, f"{round(100 * sigma):03}.npy")
+        np.save(outfp, field.expected(sigma))
+        written.append(outfp)
+
+        if verbose:
+            print(f"{outfp} (sigma {sigma}) after {round(time.perf_counter() - start, 2)} sec")
+
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sigmas", nargs="*", type=float, default=SIGMAS)
+    parser.add_argument("--directory", default=".")
+    parser.add_argument("--resolution", type=int, default=1000, help="px/unit")
+    parser.add_argument("--size", type=int, nargs=2, default=[3000, 3000], metavar=("X_PX", "Y_PX"))
+    parser.add_argument("--center", type=float, nargs=2, default=[0.0, 0.0], metavar=("X_C", "Y_C"))
+    args = parser.parse_args()
+
+    sweep(args.sigmas, args.directory, args.resolution, *args.size, *args.center)
@@ -0,0 +1,62 @@
+# Bookkeeping for resumable batch runs.
+#
+# The manifest is a JSON file with one record per finished date, keyed "month-day". It is
+# rewritten in full after every date, through a temporary file and os.replace, so a crash
+# (or a power cut on the Pi) leaves either the old manifest or the new one, never half of
+# one. On restart, any date whose record says it was finished is skipped.
+#
+# Only the parent process writes the manifest and the log and data files; the pool
+# workers just return their results, so their output can never interleave.
+
+import os
+import json
+
+
+DONE = ("solved", "no solution")
+
+
+def atomic_write(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def date_key(month, day):
+    return f"{month}-{day}"
+
+
+class Manifest:
+    def __init__(self, path="manifest.json"):
+        self.path = path
+
+        try:
+            with open(path) as f:
+                self.records = json.load(f)
+        except FileNotFoundError:
+            self.records = dict()
+
+    def __contains__(self, date):
+        return date_key(*date) in self.records
+
+    def get(self, date):
+        return self.records.get(date_key(*date))
+
+    def done(self, date):
+        # Finished dates are skipped on restart; errors (and failed images) are retried
+        record = self.get(date)
+        return record is not None and record["status"] in DONE and record.get("image", True)
+
+    def pending(self, dates):
+        return [date for date in dates if not self.done(date)]
+
+    def record(self, result):
+        self.records[date_key(result["month"], result["day"])] = result
+        self.save()
+
+    def save(self):
+        # One record per line, so the file stays readable (and diffable)
+        lines = (f"{json.dumps(key)}: {json.dumps(record)}" for key, record in self.records.items())
+        atomic_write(self.path, "{\n" + ",\n".join(lines) + "\n}\n")
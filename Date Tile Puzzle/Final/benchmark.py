@@ -0,0 +1,228 @@
+# Benchmark the date puzzle solvers, and catch regressions between runs.
+#
+# Each registered solver is run on every date in a fixed sample (the slowest, median and
+# fastest dates of the original Raspberry Pi run, plus 1-22 and a nonexistent date). Each
+# date is solved once to warm up, then timed as the best of 'repeat' runs, and the
+# solver's own search counters are recorded with it (region checks and prunes for the
+# backtracking solvers, nodes and dead ends for dancing links).
+#
+# Runs are compared with a baseline made from the history file: a date is reported if its
+# time is more than 'threshold' times the median of its times in the last few recorded
+# runs, or if its counters differ from the last recorded run (which means the search
+# itself changed). Only runs without regressions are added to the history, unless they
+# are accepted explicitly, so a slowdown stays reported until it's fixed or accepted.
+#
+# Not registered: the brute force in ../puzzle.py (about 10^345 combinations), and
+# ../puzzle.cpp, which has a hard-coded date and never sets shape_fits, so it places no
+# tiles. ../optimized_puzzle.py is registered as "legacy", but is very slow on hard dates.
+
+import os
+import sys
+import json
+import time
+
+import puzzle
+import bitboard
+import dlx
+import ordering
+from regions import RegionPruner
+
+
+SAMPLE = (
+    (1, 22),                    # the example in every __main__
+    (3, 30), (6, 1), (4, 28),   # slowest
+    (7, 16), (3, 22),           # median
+    (6, 8), (1, 3),             # fastest
+    (12, 25), (2, 31),
+)
+
+HISTORY = "benchmark_history.json"
+
+
+# Each solver takes (month, day) and returns (grid, {counter name: value})
+SOLVERS = dict()
+
+def register(name):
+    def wrap(solver):
+        SOLVERS[name] = solver
+        return solver
+    return wrap
+
+
+@register("numpy")
+def _numpy(month, day):
+    pruner = RegionPruner()
+    grid = puzzle.solve_date(month, day, pruner=pruner)
+    return grid, {"region checks": pruner.checks, "pruned": pruner.pruned}
+
+
+@register("bitboard")
+def _bitboard(month, day):
+    pruner = RegionPruner()
+    grid = bitboard.solve_date(month, day, pruner=pruner)
+    return grid, {"region checks": pruner.checks, "pruned": pruner.pruned}
+
+
+@register("ordered")
+def _ordered(month, day):
+    pruner = RegionPruner()
+    grid = ordering.solve_date(month, day, pruner=pruner)
+    return grid, {"region checks": pruner.checks, "pruned": pruner.pruned}
+
+
+@register("dlx")
+def _dlx(month, day):
+    matrix = dlx.CALENDAR.matrix
+    matrix.nodes = matrix.dead_ends = 0
+    grid = dlx.solve_date(month, day)
+    return grid, {"nodes": matrix.nodes, "dead ends": matrix.dead_ends}
+
+
+@register("legacy")
+def _legacy(month, day):
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent not in sys.path:
+        sys.path.append(parent)
+
+    from optimized_puzzle import solve_date
+    return solve_date(month, day), dict()
+
+
+def run(solvers, dates=SAMPLE, repeat=5):
+    # {solver: {"month-day": {"time": sec, "counts": {name: n}, "solved": bool}}}, with
+    # each time the best of 'repeat' runs after a warm-up run
+    results = dict()
+
+    for name in solvers:
+        results[name] = dict()
+
+        for month, day in dates:
+            SOLVERS[name](month, day)
+
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                grid, counts = SOLVERS[name](month, day)
+                best = min(best, time.perf_counter() - start)
+
+            results[name][f"{month}-{day}"] = {
+                "time": round(best, 4), "counts": counts, "solved": bool(0 not in grid)
+            }
+
+    return results
+
+
+def load_history(path=HISTORY):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(history, path=HISTORY):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def recorded(history, name, runs):
+    # The results of solver 'name' in its last 'runs' recorded runs, most recent first
+    return [entry["results"][name] for entry in reversed(history) if name in entry["results"]][:runs]
+
+
+def baseline_time(past, date):
+    # Median of the date's recorded times, or None
+    times = sorted(results[date]["time"] for results in past if date in results)
+    if not times:
+        return None
+    middle = len(times) // 2
+    return times[middle] if len(times) % 2 else (times[middle - 1] + times[middle]) / 2
+
+
+def regressions(history, results, threshold=1.25, min_time=0.05, runs=5):
+    # List of (solver, date, message) for dates that got slower than the median of the
+    # last 'runs' recorded runs of the same solver, or whose counters differ from the last
+    # one. Times under 'min_time' vary too much from run to run to compare one by one, so
+    # the total over all the dates is compared too (date "total").
+    found = []
+
+    for name, dates in results.items():
+        past = recorded(history, name, runs)
+        if not past:
+            continue
+
+        total = baselines = 0.0
+        for date, now in dates.items():
+            before = past[0].get(date)
+            if before is not None and before.get("counts") != now["counts"]:
+                found.append((name, date, f"counts {before.get('counts')} -> {now['counts']}"))
+
+            baseline = baseline_time(past, date)
+            if baseline is None:
+                continue
+
+            total += now["time"]
+            baselines += baseline
+            if max(baseline, now["time"]) >= min_time and now["time"] > threshold * baseline:
+                found.append((name, date, f"time {baseline} (median of {len(past)}) -> {now['time']} sec"))
+
+        if baselines >= min_time and total > threshold * baselines:
+            found.append((name, "total", f"time {round(baselines, 4)} (medians) -> {round(total, 4)} sec"))
+
+    return found
+
+
+def print_table(results):
+    # Time and the first counter of each solver, e.g. "bitboard (region checks)"
+    names = list(results)
+    counters = {name: next(iter(next(iter(results[name].values()))["counts"]), None) for name in names}
+    print(f"{'date':>6} " + " ".join(f"{name + (f' ({counters[name]})' if counters[name] else ''):>26}" for name in names))
+
+    for date in next(iter(results.values())):
+        cells = []
+        for name in names:
+            r = results[name][date]
+            cells.append(f"{r['time']:>9.4f}s {r['counts'].get(counters[name], '-'):>15}")
+        print(f"{date:>6} " + " ".join(cells))
+
+    print(f"{'total':>6} " + " ".join(f"{sum(r['time'] for r in results[name].values()):>9.4f}s {'':>15}" for name in names))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("solvers", nargs="*", default=["numpy", "bitboard", "dlx"], help=f"any of {', '.join(SOLVERS)}")
+    parser.add_argument("--all-dates", action="store_true", help="run all 372 dates instead of the sample")
+    parser.add_argument("--history", default=HISTORY)
+    parser.add_argument("--repeat", type=int, default=5, help="time each date as the best of this many runs")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown factor reported as a regression")
+    parser.add_argument("--baseline", type=int, default=5, metavar="RUNS", help="compare with the median of this many recorded runs")
+    parser.add_argument("--accept", action="store_true", help="record this run even if it has regressions")
+    parser.add_argument("--no-save", action="store_true", help="compare, but don't record this run")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.solvers if name not in SOLVERS]
+    if unknown:
+        parser.error(f"unknown solver(s): {', '.join(unknown)}")
+
+    dates = [(m, d) for m in range(1, 13) for d in range(1, 32)] if args.all_dates else SAMPLE
+    results = run(args.solvers, dates, args.repeat)
+    print_table(results)
+
+    history = load_history(args.history)
+    found = regressions(history, results, args.threshold, runs=args.baseline)
+
+    for name, date, message in found:
+        print(f"REGRESSION {name} {date}: {message}")
+
+    if found and not args.accept and not args.no_save:
+        print("not recorded: fix the regressions, or rerun with --accept to make this the new baseline")
+
+    if (args.accept or not found) and not args.no_save:
+        history.append({"time": time.ctime(), "dates": "all" if args.all_dates else "sample", "results": results})
+        save_history(history, args.history)
+
+    sys.exit(1 if found and not args.accept else 0)
@@ -0,0 +1,166 @@
+# Bitboard version of the solver in puzzle.py. Every legal (tile, orientation, anchor)
+# placement is computed once, at import, as a 49-bit occupancy mask (bit 7 * row + col),
+# so checking whether a tile fits is a single AND against the board mask, and placing or
+# removing it is an OR / XOR. The search order is exactly the one puzzle.solve_date uses,
+# so both engines return identical grids for every date.
+
+import numpy as np
+
+from puzzle import TILE, TRANSFORM
+from regions import ROWS, COLS, FULL, BLOCKED, RegionPruner, bit, cells
+
+
+def build_placements(tiles=TILE):
+    # PLACEMENTS[i][cell] is a tuple with one mask per transform in tiles[i].transforms
+    # (in that order), for the tile anchored at 'cell'. Out-of-bounds placements are 0.
+    table = []
+    for tile in tiles:
+        per_cell = []
+        for row in range(ROWS):
+            for col in range(COLS):
+                masks = []
+                for o in tile.transforms:
+                    shape = TRANSFORM[o] @ tile.shape + np.array([[row], [col]])
+
+                    if np.all(0 <= shape) and np.all(shape < 7):
+                        masks.append(sum(bit(int(r), int(c)) for r, c in zip(shape[0], shape[1])))
+                    else:
+                        masks.append(0)
+
+                per_cell.append(tuple(masks))
+        table.append(tuple(per_cell))
+
+    return tuple(table)
+
+
+PLACEMENTS = build_placements()
+
+
+def start_mask(month, day):
+    # Board mask with the blocked cells, the month and the day filled in
+    month -= 1
+    day -= 1
+
+    mask = BLOCKED | bit(month // 6, month % 6)
+    mask |= bit(day // 7 + 2, day % 7)
+    return mask
+
+
+def candidates(index, board, stats=None):
+    # The masks for tile 'index' that fit on 'board', in the order puzzle.ShapeIter yields
+    # them: anchors in row-major order, then transforms. ShapeIter increments before it
+    # returns, so it never yields the first transform at the first anchor; mirror that here.
+    table = PLACEMENTS[index]
+    masks = [m for row, col in cells(board ^ FULL) for m in table[row * COLS + col]][1:]
+    fits = [m for m in masks if m and not m & board]
+
+    if stats is not None:
+        # Every placement is checked up front here, rather than one at a time as in
+        # puzzle.solve_date, so the counts include placements after the one that solves
+        # the date
+        off_board = masks.count(0)
+        stats.tried[index] += len(masks)
+        stats.bounds[index] += off_board
+        stats.overlap[index] += len(masks) - off_board - len(fits)
+
+    return fits
+
+
+def to_grid(month, day, placed):
+    # Convert a sequence of placement masks (one per tile, in tile order) to the int8 grid
+    # that puzzle.solve_date returns
+    grid = np.zeros((ROWS, COLS), dtype=np.int8)
+    for row, col in cells(start_mask(month, day)):
+        grid[row, col] = -1
+
+    for index, mask in enumerate(placed, 1):
+        for row, col in cells(mask):
+            grid[row, col] = index
+
+    return grid
+
+
+def solve_date(month, day, find_all=False, pruner=None, part=None, stats=None, cache=None):
+    # 'part' = (index, parts) restricts the search to the index-th of 'parts' consecutive
+    # slices of the first tile's placements, so one date can be split across processes.
+    # 'stats' is an optional stats.SearchStats, filled in as the search runs. 'cache' is
+    # an optional transposition.DeadEnds, which can be kept between dates (not used with
+    # find_all, where running out of placements doesn't mean there was no solution).
+    if find_all:
+        cache = None
+    if pruner is None:
+        pruner = RegionPruner()
+
+    board = start_mask(month, day)
+    n = len(PLACEMENTS)
+
+    first = candidates(0, board, stats)
+    if part is not None:
+        index, parts = part
+        size = -(-len(first) // parts)
+        first = first[index * size:(index + 1) * size]
+
+    # One iterator and one placed mask per tile; the search walks up and down this stack
+    # exactly the way the 'current_index' loop in puzzle.solve_date does
+    iterators = [iter(first)] + [None] * (n - 1)
+    placed = [0] * n
+
+    current_index = 0
+    while 0 <= current_index < n:
+        if stats is not None:
+            stats.tick(current_index)
+
+        board ^= placed[current_index]
+        placed[current_index] = 0
+
+        for mask in iterators[current_index]:
+            if current_index + 1 < n:
+                # does placing this shape leave any un-fillable areas?
+                if not pruner.check(board, mask, parent_ok=current_index > 0):
+                    if stats is not None:
+                        stats.contiguous[current_index] += 1
+                    continue
+
+                # has the search already failed from the board this leads to?
+                if cache is not None and cache.seen(board | mask, (1 << n) - (2 << current_index)):
+                    if stats is not None:
+                        stats.cached[current_index] += 1
+                    continue
+
+                board |= mask
+                placed[current_index] = mask
+                current_index += 1
+                iterators[current_index] = iter(candidates(current_index, board, stats))
+
+            elif find_all:
+                placed[current_index] = mask
+                print(to_grid(month, day, placed))
+                placed[current_index] = 0
+                continue
+
+            else:
+                placed[current_index] = mask
+                current_index += 1
+
+            break
+
+        else: # tried all placements and none work
+            if stats is not None:
+                stats.backtracks[current_index] += 1
+            if cache is not None and current_index > 0:
+                cache.add(board, (1 << n) - (1 << current_index))
+            current_index -= 1
+
+    if stats is not None:
+        stats.tick(current_index)
+
+    return to_grid(month, day, placed)
+
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    pruner = RegionPruner()
+    print(solve_date(1, 22, pruner=pruner))
+    print(time.perf_counter() - start)
+    print(pruner)
@@ -0,0 +1,91 @@
+# Count (and optionally record) every solution for every date.
+#
+# Solutions come from dlx.iter_solutions, which yields each one as a tuple of eight
+# placement masks (one per tile, in tile order; see regions.py for the bit layout) and
+# finds every solution, unlike the backtracker in puzzle.py. Results are written to disk
+# as each date finishes, so nothing beyond one date's solutions is held in memory.
+#
+# Output files:
+#   solution_counts.csv  "month,day,count" per date
+#   solutions.txt        (with --solutions) one line per solution: "month-day" followed
+#                        by the eight masks in hex
+
+import time
+from itertools import product
+import multiprocessing as mp
+
+from dlx import iter_solutions
+
+
+DATES = tuple(product(range(1, 13), range(1, 32)))
+
+
+def format_solution(month, day, placed):
+    return f"{month}-{day} " + " ".join(f"{mask:013x}" for mask in placed)
+
+
+def parse_solution(line):
+    # Inverse of format_solution: returns (month, day, placed)
+    date, *masks = line.split()
+    month, day = map(int, date.split("-"))
+    return month, day, tuple(int(mask, 16) for mask in masks)
+
+
+def count_date(date, keep=False):
+    # (month, day, count, solutions); 'solutions' is empty unless 'keep' is set
+    month, day = date
+    solutions = []
+    count = 0
+
+    for placed in iter_solutions(month, day):
+        count += 1
+        if keep:
+            solutions.append(placed)
+
+    return month, day, count, solutions
+
+
+def _count_and_keep(date):
+    return count_date(date, keep=True)
+
+
+def run_census(counts_fp="solution_counts.csv", solutions_fp=None, processes=4, dates=DATES):
+    # Generator over (month, day, count) as each date finishes (in date order), writing
+    # each result to disk before it is yielded
+    worker = _count_and_keep if solutions_fp else count_date
+
+    with mp.Pool(processes=processes) as pool, open(counts_fp, "w", buffering=1) as counts:
+        solutions = open(solutions_fp, "w", buffering=1) if solutions_fp else None
+        counts.write("month,day,count\n")
+
+        try:
+            for month, day, count, placements in pool.imap(worker, dates):
+                counts.write(f"{month},{day},{count}\n")
+
+                if solutions:
+                    for placed in placements:
+                        solutions.write(format_solution(month, day, placed) + "\n")
+
+                yield month, day, count
+
+        finally:
+            if solutions:
+                solutions.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", default="solution_counts.csv")
+    parser.add_argument("--solutions", default=None, help="also write every solution to this file")
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total = 0
+    for month, day, count in run_census(args.counts, args.solutions, args.processes):
+        total += count
+        print(f"{month}-{day}: {count}")
+
+    print(f"{total} solutions in total ({round(time.perf_counter() - start, 2)} sec)")
@@ -0,0 +1,134 @@
+# Knuth's Algorithm X with dancing links, for exact cover problems: given a 0/1 matrix,
+# find every set of rows with exactly one 1 in each column. The search always branches
+# on the column with the fewest remaining rows.
+
+
+class DancingLinks:
+    # Sparse 0/1 matrix as circular doubly linked lists, stored in flat lists indexed by
+    # node number. Node 0 is the root, nodes 1..n_columns are the column headers.
+
+    def __init__(self, n_columns, rows):
+        n = n_columns + 1
+        self.left = [i - 1 for i in range(n)]
+        self.right = [i + 1 for i in range(n)]
+        self.up = list(range(n))
+        self.down = list(range(n))
+        self.column = list(range(n))
+        self.row = [-1] * n
+        self.size = [0] * n
+
+        # Search statistics: rows tried, and columns found with no rows left
+        self.nodes = 0
+        self.dead_ends = 0
+
+        self.left[0] = n_columns
+        self.right[n_columns] = 0
+
+        for row_id, columns in enumerate(rows):
+            first = None
+            for c in columns:
+                c += 1
+                node = len(self.column)
+
+                self.column.append(c)
+                self.row.append(row_id)
+                self.up.append(self.up[c])
+                self.down.append(c)
+                self.down[self.up[c]] = node
+                self.up[c] = node
+                self.size[c] += 1
+
+                if first is None:
+                    first = node
+                    self.left.append(node)
+                    self.right.append(node)
+                else:
+                    self.left.append(self.left[first])
+                    self.right.append(first)
+                    self.right[self.left[first]] = node
+                    self.left[first] = node
+
+    def cover(self, c):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+
+        right[left[c]] = right[c]
+        left[right[c]] = left[c]
+
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, c):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+
+        right[left[c]] = c
+        left[right[c]] = c
+
+    def search(self, chosen=None):
+        # Generator yielding each exact cover as a list of row ids. Every cover is undone
+        # in 'finally' blocks, so the matrix is restored even if the caller stops early.
+        if chosen is None:
+            chosen = []
+
+        right, down, column, size = self.right, self.down, self.column, self.size
+
+        if right[0] == 0:
+            yield list(chosen)
+            return
+
+        # Most constrained column first
+        c = right[0]
+        best = c
+        while c != 0:
+            if size[c] < size[best]:
+                best = c
+                if size[c] == 0:
+                    break
+            c = right[c]
+
+        if size[best] == 0:
+            self.dead_ends += 1
+            return
+
+        self.cover(best)
+        try:
+            r = down[best]
+            while r != best:
+                self.nodes += 1
+                chosen.append(self.row[r])
+
+                j = right[r]
+                while j != r:
+                    self.cover(column[j])
+                    j = right[j]
+
+                try:
+                    yield from self.search(chosen)
+                finally:
+                    j = self.left[r]
+                    while j != r:
+                        self.uncover(column[j])
+                        j = self.left[j]
+
+                    chosen.pop()
+
+                r = down[r]
+
+        finally:
+            self.uncover(best)
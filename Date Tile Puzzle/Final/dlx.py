@@ -0,0 +1,59 @@
+# Exact-cover version of the solver, using Knuth's Algorithm X with dancing links.
+#
+# Columns are the 43 cells of the board that are not permanently blocked, plus one column
+# per tile (so each tile is used exactly once). Rows are the tile placements from the
+# placements.py table, which only holds placements lying entirely on those 43 cells.
+# The matrix is built once (see engine.py), and the month and day cells are covered
+# before each search. The search always branches on the column with the fewest remaining
+# rows, which prunes dead ends far earlier than the fixed tile order in puzzle.py.
+
+from bitboard import to_grid
+from engine import Engine
+from puzzle import TILE
+from regions import BLOCKED, cells
+
+
+CALENDAR = Engine(7, 7, TILE, blocked=cells(BLOCKED))
+
+
+def date_cells(month, day):
+    month -= 1
+    day -= 1
+    return [(month // 6, month % 6), (day // 7 + 2, day % 7)]
+
+
+def iter_solutions(month, day):
+    # Yield each solution as a tuple of placement masks, one per tile, in tile order
+    return CALENDAR.solutions(date_cells(month, day))
+
+
+def count_solutions(month, day):
+    return sum(1 for _ in iter_solutions(month, day))
+
+
+def solve_date(month, day, find_all=False):
+    # Same interface as puzzle.solve_date. The solution found first may differ from the one
+    # the backtracker finds, since the search order is different.
+    for placed in iter_solutions(month, day):
+        if not find_all:
+            return to_grid(month, day, placed)
+
+        print(to_grid(month, day, placed))
+
+    return to_grid(month, day, ())
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # usage: dlx.py [month day] [first|count|all]
+    month, day = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (1, 22)
+    mode = sys.argv[3] if len(sys.argv) > 3 else "first"
+
+    start = time.perf_counter()
+    if mode == "count":
+        print(count_solutions(month, day))
+    else:
+        print(solve_date(month, day, find_all=(mode == "all")))
+    print(time.perf_counter() - start)
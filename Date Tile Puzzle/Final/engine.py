@@ -0,0 +1,112 @@
+# General polyomino board solver.
+#
+# An Engine is built once for a board (its size, and the cells that are never part of it)
+# and a set of tiles. The placement table (placements.py) and the exact cover matrix
+# (dancing_links.py) are compiled when it is created, and every query afterwards only
+# covers the cells it blocks, searches, and uncovers them again. The date puzzle is one
+# Engine (see dlx.py), queried with the month and day cells blocked; a weekday calendar,
+# a bigger board, or the 3x3 test puzzle is just another Engine.
+#
+# Each tile must be used exactly once, and every open, unblocked cell must be covered.
+# An Engine runs one query at a time.
+
+import numpy as np
+
+from dancing_links import DancingLinks
+from placements import load_table
+
+
+class Engine:
+    def __init__(self, rows, cols, tiles, blocked=()):
+        # 'tiles' as accepted by placements.tile_cells; 'blocked' is the (row, col) cells
+        # that are never part of the board
+        self.rows = rows
+        self.cols = cols
+        self.blocked = self.mask(blocked)
+
+        board = ((1 << (rows * cols)) - 1) ^ self.blocked
+        self.table = load_table(tiles, rows, cols, board)
+
+        self.open_cells = [i for i in range(rows * cols) if board >> i & 1]
+        self.column_of = {cell: i for i, cell in enumerate(self.open_cells)}
+        self.n_tiles = len(self.table.placements)
+
+        # One row per placement: (tile index, mask)
+        self.row_data = [(index, mask) for index, masks in enumerate(self.table.placements) for mask in masks]
+        self.matrix = DancingLinks(
+            len(self.open_cells) + self.n_tiles,
+            [self.columns(mask) + [len(self.open_cells) + index] for index, mask in self.row_data]
+        )
+
+    def mask(self, cells):
+        mask = 0
+        for row, col in cells:
+            if not (0 <= row < self.rows and 0 <= col < self.cols):
+                raise ValueError(f"cell {(row, col)} is not on the {self.rows}x{self.cols} board")
+            mask |= 1 << (row * self.cols + col)
+        return mask
+
+    def columns(self, mask):
+        return [self.column_of[i] for i in range(self.rows * self.cols) if mask >> i & 1]
+
+    def solutions(self, blocked=()):
+        # Yield each solution with the (row, col) cells in 'blocked' left empty, as a tuple
+        # of placement masks, one per tile, in tile order
+        blocked = self.mask(blocked)
+        if blocked & self.blocked:
+            raise ValueError("blocked cells must be on the board")
+
+        covered = []
+        try:
+            for c in self.columns(blocked):
+                self.matrix.cover(c + 1)
+                covered.append(c + 1)
+
+            for chosen in self.matrix.search():
+                placed = [0] * self.n_tiles
+                for row_id in chosen:
+                    index, mask = self.row_data[row_id]
+                    placed[index] = mask
+
+                yield tuple(placed)
+
+        finally:
+            for c in reversed(covered):
+                self.matrix.uncover(c)
+
+    def count(self, blocked=()):
+        return sum(1 for _ in self.solutions(blocked))
+
+    def solve(self, blocked=()):
+        # The first solution found, as a grid (see to_grid), or None
+        for placed in self.solutions(blocked):
+            return self.to_grid(placed, blocked)
+
+        return None
+
+    def to_grid(self, placed, blocked=()):
+        # int8 grid: -1 for cells that are off the board or blocked, 0 for empty cells, and
+        # i + 1 for cells covered by tile i
+        grid = np.zeros(self.rows * self.cols, dtype=np.int8)
+
+        for index, mask in enumerate(placed, 1):
+            for i in range(self.rows * self.cols):
+                if mask >> i & 1:
+                    grid[i] = index
+
+        for i in range(self.rows * self.cols):
+            if (self.blocked | self.mask(blocked)) >> i & 1:
+                grid[i] = -1
+
+        return grid.reshape(self.rows, self.cols)
+
+
+if __name__ == "__main__":
+    # The 3x3 test puzzle from small_puzzle.py, on the same engine as the date puzzle
+    small = Engine(3, 3, [
+        [[0, 0, -1], [0, -1, 0]],           # short L
+        [[0, 0, 1, 2], [0, 1, 0, 0]],       # long L
+        [[0, 0], [0, 1]],                   # 1x2 block
+    ])
+    print(small.solve())
+    print(f"{small.count()} solutions")
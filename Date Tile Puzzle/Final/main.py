@@ -1,46 +1,216 @@
+import os
 import time
 from itertools import product
 import multiprocessing as mp
+from functools import partial
 
-from puzzle import solve_date
+import numpy as np
+
+import puzzle
+import bitboard
+import dlx
+import ordering
 from make_img import make_img
+from regions import RegionPruner
+from batch import Manifest
+from store import SolutionStore, write_store
+from schedule import load_timings, make_tasks, SplitResults
+from stats import SearchStats, format_snapshot
+from transposition import DeadEnds
 
 
-def run(date):
-    month, day = date
+ENGINES = {
+    "numpy": puzzle.solve_date,
+    "bitboard": bitboard.solve_date,
+    "dlx": dlx.solve_date,
+    "ordered": ordering.solve_date, # with the strategy saved by 'ordering.py tune'
+}
+PRUNING_ENGINES = ("numpy", "bitboard") # engines that take a RegionPruner and a SearchStats, and report them
+SPLITTING_ENGINES = ("bitboard",) # engines that can split one date across workers
+CACHING_ENGINES = ("numpy", "bitboard", "ordered") # engines that take a transposition.DeadEnds
 
-    with open("date_puzzle_log.txt", "a", buffering=1) as log, open("grid_data.txt", "a", buffering=1) as data:
-        
-        start = time.time()
 
-        log.write(f"\nStarting date {month}-{day} at {time.ctime(start)}\n")
-        try:
-            grid = solve_date(month, day)
+# Progress reports from the workers go through this queue to the parent, which writes them
+# to the log between results (see with_progress). A report is (date label, time, stats
+# snapshot), so only plain data crosses between processes. Each worker keeps its own dead end cache
+# for all the dates it solves, if enabled.
+progress_queue = None
+dead_ends = None
+
+def init_worker(queue, cache_size=0):
+    global progress_queue, dead_ends
+    progress_queue = queue
+    dead_ends = DeadEnds(cache_size) if cache_size else None
+
+
+def run(task, engine="numpy", progress=None):
+    # Solve one date (and render it) in a pool worker. Nothing is written to the shared
+    # files here: the log lines and the grid go back to the parent, which writes them.
+    # 'task' is (date, part); see schedule.make_tasks. Parts of split dates are rendered
+    # by the parent once they have been combined. With 'progress' set, the search stats
+    # are reported every 'progress' seconds while the date is being solved.
+    (month, day), part = task
+    solve_date = ENGINES[engine]
+    label = f"{month}-{day}{'' if part is None else f' (part {part[0] + 1} of {part[1]})'}"
+
+    start = time.time()
+    log = [f"\nStarting date {label} at {time.ctime(start)}\n"]
+    result = {"month": month, "day": day, "engine": engine, "log": log}
+
+    if part is not None:
+        result["part"] = part
+
+    if progress and progress_queue is not None:
+        report = lambda stats: progress_queue.put((label, time.ctime(), stats.snapshot()))
+        stats = SearchStats(interval=progress, callback=report)
+    else:
+        stats = SearchStats()
+
+    options = dict()
+    if engine in PRUNING_ENGINES:
+        options.update(pruner=RegionPruner(), stats=stats)
+    if part is not None:
+        options["part"] = part
+    if engine in CACHING_ENGINES and dead_ends is not None:
+        options["cache"] = dead_ends
+
+    try:
+        grid = solve_date(month, day, **options)
 
-            data.write(f"{month}-{day}\n")
-            data.write(str(grid) + "\n")
-            
-        except:
-            log.write(f"Error when processing {month}-{day} (duration {round(time.time() - start, 2)} sec). Continuing.\n")
-            return
+        if engine in PRUNING_ENGINES:
+            log.append(f"Pruning for {label}: {options['pruner']}\n")
+            log.append(f"Search for {label}: {stats}\n")
+        if "cache" in options:
+            log.append(f"Dead end cache after {label}: {dead_ends}\n")
 
-        if 0 in grid:
-            log.write(f"Processing of {month}-{day} successful; no solution found. Duration {round(time.time() - start, 2)} sec.\n")
-            return
+    except Exception:
+        result.update(status="error", duration=round(time.time() - start, 2))
+        log.append(f"Error when processing {label} (duration {result['duration']} sec). Continuing.\n")
+        return result
 
-        log.write(f"Processing of {month}-{day} successful; solution found. Duration {round(time.time() - start, 2)} sec. Proceeding to image generation.\n")
+    result.update(grid=grid.tolist(), duration=round(time.time() - start, 2))
 
+    if 0 in grid:
+        result["status"] = "no solution"
+        log.append(f"Processing of {label} successful; no solution found. Duration {result['duration']} sec.\n")
+        return result
+
+    result["status"] = "solved"
+    log.append(f"Processing of {label} successful; solution found. Duration {result['duration']} sec. Proceeding to image generation.\n")
+
+    if part is None:
+        render(result)
+
+    return result
+
+
+def render(result):
+    try:
+        make_img(np.array(result["grid"], dtype=np.int8), result["month"], result["day"])
+    except Exception:
+        result["image"] = False
+        result["log"].append(f"Error when creating image.\n")
+    else:
+        result["image"] = True
+        result["log"].append(f"Image successfully created.\n")
+
+
+def with_progress(results, queue, log, poll=1):
+    # Yield from the imap iterator 'results', writing the workers' progress reports to
+    # 'log' while waiting
+    while True:
         try:
-            make_img(grid, month, day)
-        except:
-            log.write(f"Error when creating image.\n")
-        else:
-            log.write(f"Image successfully created.\n")
+            result = results.next(timeout=poll)
+        except mp.TimeoutError:
+            result = None
+        except StopIteration:
+            break
+
+        while not queue.empty():
+            write_progress(log, *queue.get())
+
+        if result is not None:
+            yield result
+
+    while not queue.empty():
+        write_progress(log, *queue.get())
+
+
+def write_progress(log, label, when, snapshot):
+    log.write(f"\nProgress on {label} at {when}: {format_snapshot(snapshot)}\n")
+
+
+def run_all(dates, engine="numpy", processes=4, manifest_fp="manifest.json", split=0, progress=None, cache_size=0):
+    # Solve every date not already finished according to the manifest, slowest first (by
+    # the times recorded in earlier runs), splitting the 'split' slowest across workers.
+    # Each result is written by this (parent) process as soon as it arrives: the log block
+    # and grid in single writes, then the manifest atomically. Progress reports for dates
+    # still being solved are written in between, every 'progress' seconds per worker. With
+    # 'cache_size', each worker keeps a transposition.DeadEnds of that size across dates.
+    manifest = Manifest(manifest_fp)
+    pending = manifest.pending(dates)
+
+    if engine not in SPLITTING_ENGINES:
+        split = 0
+    tasks = make_tasks(pending, load_timings(manifest=manifest), split, processes)
+    split_results = SplitResults()
+
+    with open("date_puzzle_log.txt", "a", buffering=1) as log, open("grid_data.txt", "a", buffering=1) as data:
+        log.write(f"\nBatch run: {len(dates) - len(pending)} dates already finished, {len(pending)} to go.\n")
+
+        queue = mp.Queue()
+        with mp.Pool(processes=processes, initializer=init_worker, initargs=(queue, cache_size)) as pool:
+            results = pool.imap_unordered(partial(run, engine=engine, progress=progress), tasks, chunksize=1)
+
+            for result in with_progress(results, queue, log):
+                if "part" in result:
+                    result = split_results.add(result)
+                    if result is None:
+                        continue
+
+                    if result["status"] == "solved":
+                        render(result)
+
+                log.write("".join(result.pop("log")))
+
+                if "grid" in result:
+                    data.write(f"{result['month']}-{result['day']}\n{np.array(result['grid'], dtype=np.int8)}\n")
+
+                manifest.record(result)
+
+    update_store("solutions.bin", manifest)
+
+
+def update_store(path, manifest):
+    # Add every date the manifest has solved to the binary solution store, keeping the
+    # dates already in it (imported from grid_data.txt, added by query.py, or not reached
+    # by this run)
+    solutions = dict()
+    if os.path.exists(path):
+        with SolutionStore(path) as store:
+            for date in store.dates():
+                solutions[date] = store.solutions(*date)
+
+    for record in manifest.records.values():
+        if record["status"] == "solved":
+            solutions[(record["month"], record["day"])] = [record["grid"]]
+
+    write_store(path, solutions)
 
 
 if __name__ == "__main__":
-    with mp.Pool(processes=4) as pool:
-        pool.map(run, product(range(1, 13), range(1, 32)))
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engine", choices=ENGINES, default="numpy")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--manifest", default="manifest.json")
+    parser.add_argument("--split", type=int, default=0, help="split this many of the slowest dates across workers (bitboard only)")
+    parser.add_argument("--progress", type=float, default=None, metavar="SECONDS", help="log search progress this often (numpy and bitboard only)")
+    parser.add_argument("--cache", type=int, default=0, metavar="ENTRIES", help="keep up to this many dead ends per worker (numpy, bitboard and ordered)")
+    args = parser.parse_args()
+
+    run_all(list(product(range(1, 13), range(1, 32))), args.engine, args.processes, args.manifest, args.split, args.progress, args.cache)
 
     with open("date_puzzle_log.txt", "a", buffering=1) as log:
         log.write(f"All dates complete (finished at {time.ctime(time.time())}).")
@@ -1,3 +1,8 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
@@ -8,7 +13,15 @@ COLORS = (
     (255, 218, 51), (244, 102, 162), (214, 24, 0), (148, 255, 82)
 )
 
-font = ImageFont.truetype("C:/Windows/Fonts/Arial/arialbd.ttf", size=36)
+# Fonts to try, in order, when a Renderer is not given one. If none can be loaded, Pillow's
+# built-in font is used.
+FONT_PATHS = (
+    "C:/Windows/Fonts/Arial/arialbd.ttf",
+    "arialbd.ttf",
+    "DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+)
+FONT_SIZE = 36
 
 
 def get_corners(pts):
@@ -21,178 +34,247 @@ def get_corners(pts):
     #       interior non-corners will have a count of 4
     #       exterior edges (non-corners) will have a count of 2
     #   - therefore: even => non-corner, odd => corner
+    #   - then walk once around the boundary of the shape, keeping the corners in the order
+    #     they are passed
 
     # adjustment: points are passed in (row, col) (from numpy.argwhere), 
     # but that corresponds to  (y, x), and everything with PIL is (x, y),
     # so we need to switch.
-    pts[:, [1, 0]] = pts[:, [0, 1]]
+    pts = [(col, row) for row, col in pts.tolist()]
+    cells = set(pts)
 
+    # Corner counts, in units of squares. The dict keeps the order corners are first seen in,
+    # which decides where the outline starts and which way it goes (see below).
     corner_counts = dict()
-    for point in pts:
-        for col_offset in (0, SIZE):
-            for row_offset in (0, SIZE):
-
-                corner = (point[0] * SIZE + col_offset + 1, point[1] * SIZE + row_offset + 1)
-                if corner in corner_counts:
-                    corner_counts[corner] += 1
-                else:
-                    corner_counts[corner] = 1
-
-    # Now, put them in order
-    odd_corners = [corner for corner in corner_counts.keys() if corner_counts[corner] % 2]
-    ordered = [odd_corners.pop(0)]
-
-    while odd_corners: # until unordered corners list has no items
-        # find the next corner (the one matching either the x or y coordinate of the previous)
-        for corner in odd_corners:
-            # make sure we're not crossing back over the shape
-            # check if all boxes to the left are filled and none to the right are (or vice versa)
-            
-            pts_tolist = pts.tolist() # (since checking if a row is part of an array is weird)
-
-            if corner[0] == ordered[-1][0]: # edge aligned vertically
-                grid_c = (corner[0] -1) // SIZE
-                r_min = (min(corner[1], ordered[-1][1]) - 1) // SIZE
-                r_max = (max(corner[1], ordered[-1][1]) - 1) // SIZE
-                
-                # lists of points to the left and right of the potential edge
-                left = [[grid_c - 1, grid_r] for grid_r in range(r_min, r_max)]
-                right = [[grid_c, grid_r] for grid_r in range(r_min, r_max)]
-
-                # 'continue' if not (either all of one are part of the shape and none of the other are, or vice versa)
-                if not (
-                    all(pt in pts_tolist for pt in left) and not any(pt in pts_tolist for pt in right) 
-                    or not any(pt in pts_tolist for pt in left) and all(pt in pts_tolist for pt in right)
-                ):
+    for x, y in pts:
+        for corner in ((x, y), (x, y + 1), (x + 1, y), (x + 1, y + 1)):
+            corner_counts[corner] = corner_counts.get(corner, 0) + 1
+
+    odd_corners = [corner for corner, count in corner_counts.items() if count % 2]
+
+    # Boundary edges: each side of a square whose neighbor across that side is not part of
+    # the shape. Map each boundary vertex to the (two) vertices it is joined to.
+    joined = dict()
+    for x, y in cells:
+        for (dx, dy), a, b in (
+            ((-1, 0), (x, y), (x, y + 1)), ((1, 0), (x + 1, y), (x + 1, y + 1)),
+            ((0, -1), (x, y), (x + 1, y)), ((0, 1), (x, y + 1), (x + 1, y + 1))
+        ):
+            if (x + dx, y + dy) not in cells:
+                joined.setdefault(a, []).append(b)
+                joined.setdefault(b, []).append(a)
+
+    if any(len(ends) != 2 for ends in joined.values()):
+        raise RuntimeError("Issue when determining shape boundaries")
+
+    # Walk around the boundary from the first corner, keeping only the corners
+    start = odd_corners[0]
+    ordered = [start]
+    previous, current = start, joined[start][0]
+    while current != start:
+        if corner_counts[current] % 2:
+            ordered.append(current)
+        previous, current = current, joined[current][0] if joined[current][1] == previous else joined[current][1]
+
+    if len(ordered) != len(odd_corners):
+        raise RuntimeError("Issue when determining shape boundaries")
+
+    # Go around the way the original search did: towards whichever of the two neighboring
+    # corners was seen first
+    position = {corner: i for i, corner in enumerate(odd_corners)}
+    if position[ordered[-1]] < position[ordered[1]]:
+        ordered[1:] = ordered[:0:-1]
+
+    return [(x * SIZE + 1, y * SIZE + 1) for x, y in ordered]
+
+
+class Renderer:
+    # Draws both styles of solution image. Everything that is the same for every date
+    # underneath the tiles (the background and the grayed-out regions) is drawn once, into
+    # templates, and each image starts from a copy of a template. The outer border and the
+    # grid lines go on top of the tiles, so they are drawn on every image, from coordinates
+    # worked out once; that is quicker than compositing a full-size overlay with a mask.
+    # The font is only loaded when first needed.
+
+    def __init__(self, font_path=None):
+        self.font_paths = (font_path,) if font_path else FONT_PATHS
+        self._font = None
+
+        full = (7 * SIZE + 2, 7 * SIZE + 2)
+
+        # Grayscale template: background and grayed out regions (with outlines)
+        self.bw_template = Image.new("RGB", full, (255, 255, 255))
+        draw = ImageDraw.Draw(self.bw_template)
+        draw.rectangle(
+            [(3 * SIZE + 1, 6 * SIZE + 1), (7 * SIZE + 1, 7 * SIZE + 1)],
+            outline=(0, 0, 0), fill=(204, 204, 204), width=1
+        )
+        draw.rectangle(
+            [(6 * SIZE + 1, 1), (7 * SIZE + 1, 2 * SIZE + 1)],
+            outline=(0, 0, 0), fill=(204, 204, 204), width=1
+        )
+
+        # Grayscale: outer border, drawn on top of the tile outlines
+        self.border = [(1, 1), (7 * SIZE + 1, 7 * SIZE + 1)]
+
+        # Color template: background and grayed out regions (no outlines)
+        self.co_template = Image.new("RGB", full, (255, 255, 255))
+        draw = ImageDraw.Draw(self.co_template)
+        draw.rectangle(
+            [(3 * SIZE + 1, 6 * SIZE + 1), (7 * SIZE + 1, 7 * SIZE + 1)],
+            outline=None, fill=(204, 204, 204), width=1
+        )
+        draw.rectangle(
+            [(6 * SIZE + 1, 1), (7 * SIZE + 1, 2 * SIZE + 1)],
+            outline=None, fill=(204, 204, 204), width=1
+        )
+
+        # Color: grid lines, drawn on top of the tiles
+        self.grid_lines = []
+        for i in range(8):
+            self.grid_lines.append([(1 + i * SIZE, 1), (1 + i * SIZE, 7 * SIZE + 1)])
+            self.grid_lines.append([(1, 1 + i * SIZE), (7 * SIZE + 1, 1 + i * SIZE)])
+
+    @property
+    def font(self):
+        if self._font is None:
+            for path in self.font_paths:
+                try:
+                    self._font = ImageFont.truetype(path, size=FONT_SIZE)
+                    break
+                except OSError:
                     continue
+            else:
+                self._font = ImageFont.load_default(size=FONT_SIZE)
 
+        return self._font
 
-            elif corner[1] == ordered[-1][1]: # edge aligned horizontally
-                grid_r = (corner[1] - 1) // SIZE
-                c_min = (min(corner[0], ordered[-1][0]) - 1) // SIZE
-                c_max = (max(corner[0], ordered[-1][0]) - 1) // SIZE
+    def render(self, grid, month, day):
+        # Returns the (grayscale, color) images for one solution
+        outlines = [get_corners(np.argwhere(grid == shape_num)) for shape_num in range(1, 9)]
 
-                # lists of points above and below the potential edge
-                top = [[grid_c, grid_r - 1] for grid_c in range(c_min, c_max)]
-                bottom = [[grid_c, grid_r] for grid_c in range(c_min, c_max)]
+        # Month and day positions
+        mo_x = SIZE * ((month - 1) % 6) + 1
+        mo_y = SIZE * ((month - 1) // 6) + 1
+        day_x = SIZE * ((day - 1) % 7) + 1
+        day_y = SIZE * ((day - 1) // 7 + 2) + 1
 
-                # continue if not (either all of one are part of the shape and none of the other are, or vice versa)
-                if not (
-                    all(pt in pts_tolist for pt in top) and not any(pt in pts_tolist for pt in bottom) 
-                    or not any(pt in pts_tolist for pt in top) and all(pt in pts_tolist for pt in bottom)
-                ):
-                    continue
+        # First, the grayscale image (just borders, text, and grayed regions)
+        bw = self.bw_template.copy()
+        draw = ImageDraw.Draw(bw)
 
-                
-            else: # there is no edge (the corners are not aligned)
-                continue
-            
-            # If we haven't 'continue'd yet, the edge is valid
-            ordered.append(corner)
-            odd_corners.remove(corner)
-            break
+        draw.rectangle([(mo_x, mo_y), (mo_x + SIZE, mo_y + SIZE)], outline=(0, 0, 0), fill=None, width=1)
+        draw.rectangle([(day_x, day_y), (day_x + SIZE, day_y + SIZE)], outline=(0, 0, 0), fill=None, width=1)
+        self.draw_text(draw, month, day, mo_x, mo_y, day_x, day_y)
 
-        else:
-            raise RuntimeError("Issue when determining shape boundaries")
+        for corners in outlines:
+            draw.line(corners, fill=(0, 0, 0), width=1)
 
-    return ordered
+        draw.rectangle(self.border, outline=(0, 0, 0), fill=None, width=2)
 
+        # Now the color image
+        co = self.co_template.copy()
+        draw = ImageDraw.Draw(co)
 
-def make_img(grid, month, day, save=True):
-    # First, the grayscale image (just borders, text, and grayed regions)
-    img = Image.new("RGB", (7 * SIZE + 2, 7 * SIZE + 2), (255, 255, 255))
-
-    # Get a drawing context
-    draw = ImageDraw.Draw(img)
-
-    # Draw grayed out regions
-    draw.rectangle(
-        [(3 * SIZE + 1, 6 * SIZE + 1), (7 * SIZE + 1, 7 * SIZE + 1)],
-        outline=(0, 0, 0), fill=(204, 204, 204), width=1
-    )
-    draw.rectangle(
-        [(6 * SIZE + 1, 1), (7 * SIZE + 1, 2 * SIZE + 1)],
-        outline=(0, 0, 0), fill=(204, 204, 204), width=1
-    )
-
-    # Draw month and day, plus text
-    mo_x = SIZE * ((month - 1) % 6) + 1
-    mo_y = SIZE * ((month - 1) // 6) + 1
-    day_x = SIZE * ((day - 1) % 7) + 1
-    day_y = SIZE * ((day - 1) // 7 + 2) + 1
-
-    draw.rectangle([(mo_x, mo_y), (mo_x + SIZE, mo_y + SIZE)], outline=(0, 0, 0), fill=None, width=1)
-    draw.rectangle([(day_x, day_y), (day_x + SIZE, day_y + SIZE)], outline=(0, 0, 0), fill=None, width=1)
-
-    draw.text((mo_x + SIZE // 2, mo_y + SIZE // 2), MONTHS[month - 1], fill=(0, 0, 0), font=font, align="center", anchor="mm")
-    draw.text((day_x + SIZE // 2, day_y + SIZE // 2), str(day), fill=(0, 0, 0), font=font, align="center", anchor="mm")
-
-    # Draw the outlines of the shapes
-    for shape_num in range(1, 9):
-        pts = np.argwhere(grid == shape_num)
-        corners = get_corners(pts)
-        draw.line(corners, fill=(0, 0, 0), width=1)
-
-    # Draw outer border
-    draw.rectangle([(1, 1), (7 * SIZE + 1, 7 * SIZE + 1)], outline=(0, 0, 0), fill=None, width=2)
+        self.draw_text(draw, month, day, mo_x, mo_y, day_x, day_y)
 
-    if save:
-        img.save(f"{month}-{day}_BW.png")
-    else:
-        img.show()
+        for shape_num, corners in enumerate(outlines, 1):
+            draw.polygon(corners, outline=None, fill=COLORS[shape_num - 1])
 
+        for line in self.grid_lines:
+            draw.line(line, fill=(0, 0, 0), width=1)
 
-    # Now the color image
-    img = Image.new("RGB", (7 * SIZE + 2, 7 * SIZE + 2), (255, 255, 255))
+        return bw, co
 
-    # Get a drawing context
-    draw = ImageDraw.Draw(img)
+    def draw_text(self, draw, month, day, mo_x, mo_y, day_x, day_y):
+        draw.text((mo_x + SIZE // 2, mo_y + SIZE // 2), MONTHS[month - 1], fill=(0, 0, 0), font=self.font, align="center", anchor="mm")
+        draw.text((day_x + SIZE // 2, day_y + SIZE // 2), str(day), fill=(0, 0, 0), font=self.font, align="center", anchor="mm")
 
-    # Draw grayed out regions
-    draw.rectangle(
-        [(3 * SIZE + 1, 6 * SIZE + 1), (7 * SIZE + 1, 7 * SIZE + 1)],
-        outline=None, fill=(204, 204, 204), width=1
-    )
-    draw.rectangle(
-        [(6 * SIZE + 1, 1), (7 * SIZE + 1, 2 * SIZE + 1)],
-        outline=None, fill=(204, 204, 204), width=1
-    )
+    def save(self, grid, month, day, directory="."):
+        bw, co = self.render(grid, month, day)
+        bw.save(os.path.join(directory, f"{month}-{day}_BW.png"))
+        co.save(os.path.join(directory, f"{month}-{day}_CO.png"))
 
-    # Draw month and day, plus text
-    mo_x = SIZE * ((month - 1) % 6) + 1
-    mo_y = SIZE * ((month - 1) // 6) + 1
-    day_x = SIZE * ((day - 1) % 7) + 1
-    day_y = SIZE * ((day - 1) // 7 + 2) + 1
 
-    draw.text((mo_x + SIZE // 2, mo_y + SIZE // 2), MONTHS[month - 1], fill=(0, 0, 0), font=font, align="center", anchor="mm")
-    draw.text((day_x + SIZE // 2, day_y + SIZE // 2), str(day), fill=(0, 0, 0), font=font, align="center", anchor="mm")
+_renderer = None
 
-    # Draw the outlines of the shapes
-    for shape_num in range(1, 9):
-        pts = np.argwhere(grid == shape_num)
-        corners = get_corners(pts)
-        draw.polygon(corners, outline=None, fill=COLORS[shape_num - 1])
+def get_renderer():
+    # One Renderer per process, created on first use
+    global _renderer
+    if _renderer is None:
+        _renderer = Renderer(os.environ.get("DATE_PUZZLE_FONT"))
+    return _renderer
 
-    # Draw the grid lines
-    for i in range(8):
-        draw.line([(1 + i * SIZE, 1), (1 + i * SIZE, 7 * SIZE + 1)], fill=(0, 0, 0), width=1)
-        draw.line([(1, 1 + i * SIZE), (7 * SIZE + 1, 1 + i * SIZE)], fill=(0, 0, 0), width=1)
 
+def make_img(grid, month, day, save=True):
     if save:
-        img.save(f"{month}-{day}_CO.png")
+        get_renderer().save(grid, month, day)
     else:
-        img.show()
+        for img in get_renderer().render(grid, month, day):
+            img.show()
+
+
+def _save_one(args):
+    grid, month, day, directory = args
+    get_renderer().save(grid, month, day, directory)
+    return month, day
+
+
+def render_all(solutions, directory=".", processes=1, encoders=0):
+    # Render and save both images for each (grid, month, day) in 'solutions'. With several
+    # processes, each worker renders and encodes its own images; otherwise rendering happens
+    # here, and PNG encoding can be handed to 'encoders' threads.
+    if processes > 1:
+        with mp.Pool(processes=processes) as pool:
+            jobs = ((grid, month, day, directory) for grid, month, day in solutions)
+            return list(pool.imap_unordered(_save_one, jobs, chunksize=8))
+
+    renderer = get_renderer()
+    done = []
+
+    with ThreadPoolExecutor(max_workers=encoders) if encoders else nullcontext() as executor:
+        saves = []
+        for grid, month, day in solutions:
+            bw, co = renderer.render(grid, month, day)
+            for img, style in ((bw, "BW"), (co, "CO")):
+                path = os.path.join(directory, f"{month}-{day}_{style}.png")
+                if executor:
+                    saves.append(executor.submit(img.save, path))
+                else:
+                    img.save(path)
+            done.append((month, day))
 
+        for future in saves:
+            future.result()
+
+    return done
 
 
 if __name__ == "__main__":
-    grid = np.array([
-        [1, 2, 2, 2, -1, 5, -1],
-        [1, 1, 1, 2, 5, 5, -1],
-        [8, 8, 1, 2, 5, 4, 4],
-        [8, 7, 7, 7, 5, 4, 4],
-        [8, 7, 6, 7, 3, 4, 4],
-        [8, 6, 6, 3, 3, 3, 3],
-        [-1, 6, 6, -1, -1, -1, -1]
-    ])
-    make_img(grid, 5, 29, save=False)
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "all":
+        # usage: make_img.py all [solutions.bin] [output directory] [processes]
+        import time
+        from store import SolutionStore
+
+        start = time.perf_counter()
+        with SolutionStore(*sys.argv[2:3]) as store:
+            solutions = [(store.get(month, day), month, day) for month, day in store.dates()]
+        directory = sys.argv[3] if len(sys.argv) > 3 else "."
+        processes = int(sys.argv[4]) if len(sys.argv) > 4 else mp.cpu_count()
+
+        render_all(solutions, directory, processes=processes, encoders=0 if processes > 1 else 4)
+        print(f"rendered {len(solutions)} dates in {round(time.perf_counter() - start, 2)} sec")
+
+    else:
+        grid = np.array([
+            [1, 2, 2, 2, -1, 5, -1],
+            [1, 1, 1, 2, 5, 5, -1],
+            [8, 8, 1, 2, 5, 4, 4],
+            [8, 7, 7, 7, 5, 4, 4],
+            [8, 7, 6, 7, 3, 4, 4],
+            [8, 6, 6, 3, 3, 3, 3],
+            [-1, 6, 6, -1, -1, -1, -1]
+        ])
+        make_img(grid, 5, 29, save=False)
@@ -0,0 +1,248 @@
+# Backtracking solver with pluggable tile selection.
+#
+# puzzle.py always places the tiles in the order of puzzle.TILE, which was arranged by hand
+# so that the 2x3 block goes last. Here the choice of what to branch on next is left to a
+# strategy, called at every step with the board and the tiles still unplaced, which returns
+# the (tile, mask) placements to try:
+#
+#   Static(order)          the first unplaced tile in a fixed order, like puzzle.py
+#   FewestPlacements()     the unplaced tile with the fewest placements that still fit
+#   MostConstrainedCell()  the empty cell covered by the fewest fitting placements, trying
+#                          every placement that covers it (some tile has to)
+#
+# tune() tries the strategies, plus static orders improved by swapping neighbouring tiles,
+# on a sample of dates, and saves the fastest to tile_order.json; solve_date (the "ordered"
+# engine in main.py) uses the saved strategy unless it is given one.
+#
+# Placements come from the placements.py table, so the solutions found differ from the ones
+# puzzle.py and bitboard.py return for the same order.
+
+import json
+import time
+
+from bitboard import start_mask, to_grid
+from placements import load_table
+from regions import FULL, RegionPruner
+from transposition import tiles_mask
+
+
+TABLE = load_table()
+SIZES = tuple(len(tile) for tile in TABLE.tiles)
+N_TILES = len(SIZES)
+
+# The cells each placement covers, for counting placements per cell
+MASK_CELLS = {
+    mask: tuple(cell for cell in range(49) if mask >> cell & 1)
+    for masks in TABLE.placements for mask in masks
+}
+
+ORDER_FILE = "tile_order.json"
+
+# Every seventh date. The benchmark sample is mostly the fastest and slowest dates, and a
+# static order tuned on it is three times slower than MostConstrainedCell over the year.
+TUNE_SAMPLE = tuple((m, d) for m in range(1, 13) for d in range(1, 32))[::7]
+
+
+class Static:
+    __slots__ = ("order",)
+    name = "static"
+
+    def __init__(self, order=range(N_TILES)):
+        self.order = tuple(order)
+
+    def __call__(self, board, remaining):
+        tile = next(i for i in self.order if i in remaining)
+        return [(tile, mask) for mask in TABLE.placements[tile] if not mask & board]
+
+    def to_json(self):
+        return {"strategy": self.name, "order": list(self.order)}
+
+    def __str__(self):
+        return f"static {''.join(str(i + 1) for i in self.order)}"
+
+
+class FewestPlacements:
+    __slots__ = ()
+    name = "fewest"
+
+    def __call__(self, board, remaining):
+        best = None
+        for tile in remaining:
+            fits = [(tile, mask) for mask in TABLE.placements[tile] if not mask & board]
+            if best is None or len(fits) < len(best):
+                best = fits
+                if not best:
+                    break
+        return best
+
+    def to_json(self):
+        return {"strategy": self.name}
+
+    def __str__(self):
+        return "fewest placements"
+
+
+class MostConstrainedCell:
+    __slots__ = ()
+    name = "cell"
+
+    def __call__(self, board, remaining):
+        counts = [0] * 49
+        for tile in remaining:
+            for mask in TABLE.placements[tile]:
+                if not mask & board:
+                    for cell in MASK_CELLS[mask]:
+                        counts[cell] += 1
+
+        empty = board ^ FULL
+        cell = min((c for c in range(49) if empty >> c & 1), key=counts.__getitem__)
+
+        return [
+            (tile, mask) for tile, mask in TABLE.covering[cell]
+            if tile in remaining and not mask & board
+        ]
+
+    def to_json(self):
+        return {"strategy": self.name}
+
+    def __str__(self):
+        return "most constrained cell"
+
+
+STRATEGIES = {cls.name: cls for cls in (Static, FewestPlacements, MostConstrainedCell)}
+
+
+def from_json(data):
+    cls = STRATEGIES[data["strategy"]]
+    return cls(data["order"]) if cls is Static else cls()
+
+
+def save_strategy(strategy, path=ORDER_FILE):
+    with open(path, "w") as f:
+        json.dump(strategy.to_json(), f)
+
+
+def load_strategy(path=ORDER_FILE):
+    # The strategy saved by tune(), or the puzzle.py order if there is none
+    try:
+        with open(path) as f:
+            return from_json(json.load(f))
+    except FileNotFoundError:
+        return Static()
+
+
+def search(board, remaining, placed, strategy, pruner, cache=None):
+    # Yield each solution as a list of placement masks, one per tile, in tile order.
+    # Boards from which no solution was found are added to 'cache' (a DeadEnds), if given.
+    if not remaining:
+        yield placed
+        return
+
+    found = False
+    for tile, mask in strategy(board, remaining):
+        rest = tuple(i for i in remaining if i != tile)
+
+        # does placing this shape leave any un-fillable areas?
+        if rest and not pruner.check(board, mask, parent_ok=len(rest) < N_TILES - 1, room=max(SIZES[i] for i in rest)):
+            continue
+
+        # has the search already failed from the board this leads to?
+        if cache is not None and rest and cache.seen(board | mask, tiles_mask(rest)):
+            continue
+
+        placed[tile] = mask
+        for solution in search(board | mask, rest, placed, strategy, pruner, cache):
+            found = True
+            yield solution
+        placed[tile] = 0
+
+    if cache is not None and not found:
+        cache.add(board, tiles_mask(remaining))
+
+
+def solve_date(month, day, find_all=False, pruner=None, strategy=None, cache=None):
+    # 'cache' is an optional transposition.DeadEnds, which can be kept between dates
+    if pruner is None:
+        pruner = RegionPruner()
+    if strategy is None:
+        strategy = load_strategy()
+
+    placed = [0] * N_TILES
+    for placed in search(start_mask(month, day), tuple(range(N_TILES)), placed, strategy, pruner, cache):
+        if not find_all:
+            return to_grid(month, day, placed)
+
+        print(to_grid(month, day, placed))
+
+    return to_grid(month, day, ())
+
+
+def measure(strategy, dates):
+    # (total seconds, total region checks) to solve every date in 'dates'
+    pruner = RegionPruner()
+    start = time.perf_counter()
+    for month, day in dates:
+        solve_date(month, day, pruner=pruner, strategy=strategy)
+    return time.perf_counter() - start, pruner.checks
+
+
+def improve(order, dates, cost):
+    # Swap neighbouring tiles in a static order while that lowers the number of region
+    # checks (deterministic, unlike times), starting from 'order' with 'cost' checks
+    order = list(order)
+    improved = True
+
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            trial = order[:i] + [order[i + 1], order[i]] + order[i + 2:]
+            checks = measure(Static(trial), dates)[1]
+
+            if checks < cost:
+                order, cost, improved = trial, checks, True
+
+    return Static(order)
+
+
+def tune(dates=TUNE_SAMPLE, path=ORDER_FILE, verbose=True):
+    # Time every strategy on 'dates', save the fastest to 'path' and return it
+    # Static orders: puzzle.py's, and the tiles with the fewest placements first
+    fewest_first = sorted(range(N_TILES), key=lambda i: len(TABLE.placements[i]))
+    candidates = [Static(), Static(fewest_first), FewestPlacements(), MostConstrainedCell()]
+
+    results = []
+    for strategy in candidates:
+        results.append((strategy, *measure(strategy, dates)))
+
+    for strategy, _, checks in list(results[:2]):
+        tuned = improve(strategy.order, dates, checks)
+        if all(getattr(other, "order", None) != tuned.order for other, _, _ in results):
+            results.append((tuned, *measure(tuned, dates)))
+
+    best = min(results, key=lambda result: result[1])[0]
+    save_strategy(best, path)
+
+    if verbose:
+        for strategy, seconds, checks in results:
+            print(f"{str(strategy):>24} {seconds:>9.4f}s {checks:>9} checks{'  <- saved' if strategy is best else ''}")
+
+    return best
+
+
+if __name__ == "__main__":
+    import sys
+
+    # usage: ordering.py tune
+    #        ordering.py [month day] [static|fewest|cell]
+    if sys.argv[1:2] == ["tune"]:
+        tune()
+
+    else:
+        month, day = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (1, 22)
+        strategy = STRATEGIES[sys.argv[3]]() if len(sys.argv) > 3 else load_strategy()
+
+        start = time.perf_counter()
+        pruner = RegionPruner()
+        print(solve_date(month, day, pruner=pruner, strategy=strategy))
+        print(f"{strategy}: {time.perf_counter() - start} sec")
+        print(pruner)
@@ -0,0 +1,142 @@
+# Placement tables built straight from the tile shapes.
+#
+# Instead of relying on the transform indices hand-listed in puzzle.TILE, the distinct
+# orientations of each tile are found by applying all eight TRANSFORM matrices, shifting
+# each result so its smallest row and column are 0, and dropping repeated cell sets. Every
+# orientation is then placed at every offset that keeps it on the board, giving one mask
+# per placement (bit row * cols + col), plus, for every cell, the placements covering it.
+#
+# Tables are pickled to a cache directory, keyed on the board and tile shapes, so that
+# after the first run a solver can load one in a few milliseconds. Any tile set works.
+
+import os
+import pickle
+import hashlib
+
+import numpy as np
+
+from puzzle import TILE, TRANSFORM
+from regions import ROWS, COLS, BLOCKED, FULL
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "placement_cache")
+
+
+class PlacementTable:
+    __slots__ = ("rows", "cols", "board", "tiles", "placements", "covering")
+
+    def __init__(self, rows, cols, board, tiles, placements, covering):
+        self.rows = rows
+        self.cols = cols
+        self.board = board            # mask of the cells tiles may cover
+        self.tiles = tiles            # each tile as a tuple of (row, col) offsets
+        self.placements = placements  # placements[i]: tuple of masks for tile i
+        self.covering = covering      # covering[cell]: tuple of (tile, mask) covering that cell
+
+
+def tile_cells(tile):
+    # Normalize a tile (a puzzle.Tile, a 2xN array of row/col offsets, or a sequence
+    # of (row, col) pairs) to a tuple of (row, col) pairs
+    if hasattr(tile, "shape") and not isinstance(tile, np.ndarray):
+        tile = tile.shape
+
+    tile = np.asarray(tile)
+    if tile.shape[0] != 2:
+        tile = tile.T
+
+    return tuple((int(r), int(c)) for r, c in zip(tile[0], tile[1]))
+
+
+def orientations(cells):
+    # Distinct orientations of a tile under D4, each as a sorted tuple of (row, col) cells
+    # with minimum row and column 0, in order of first appearance in TRANSFORM
+    shape = np.array(cells).T
+    seen = []
+
+    for matrix in TRANSFORM:
+        pts = matrix @ shape
+        pts = pts - pts.min(axis=1, keepdims=True)
+        normal = tuple(sorted((int(r), int(c)) for r, c in zip(pts[0], pts[1])))
+
+        if normal not in seen:
+            seen.append(normal)
+
+    return seen
+
+
+def build_table(tiles=TILE, rows=ROWS, cols=COLS, board=None):
+    if board is None:
+        board = BLOCKED ^ FULL if (rows, cols) == (ROWS, COLS) else (1 << (rows * cols)) - 1
+
+    tiles = tuple(tile_cells(tile) for tile in tiles)
+    placements = []
+    covering = [[] for _ in range(rows * cols)]
+
+    for index, cells in enumerate(tiles):
+        masks = []
+        for orient in orientations(cells):
+            height = max(r for r, _ in orient) + 1
+            width = max(c for _, c in orient) + 1
+
+            for dr in range(rows - height + 1):
+                for dc in range(cols - width + 1):
+                    mask = sum(1 << ((r + dr) * cols + c + dc) for r, c in orient)
+
+                    if not mask & ~board:
+                        masks.append(mask)
+
+        for mask in masks:
+            cell = 0
+            while (1 << cell) <= mask:
+                if mask >> cell & 1:
+                    covering[cell].append((index, mask))
+                cell += 1
+
+        placements.append(tuple(masks))
+
+    return PlacementTable(rows, cols, board, tiles, tuple(placements), tuple(map(tuple, covering)))
+
+
+def cache_key(tiles, rows, cols, board):
+    text = repr((rows, cols, board, tuple(tile_cells(tile) for tile in tiles)))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def load_table(tiles=TILE, rows=ROWS, cols=COLS, board=None, cache_dir=CACHE_DIR):
+    # build_table, but cached on disk
+    if board is None:
+        board = BLOCKED ^ FULL if (rows, cols) == (ROWS, COLS) else (1 << (rows * cols)) - 1
+
+    path = os.path.join(cache_dir, cache_key(tiles, rows, cols, board) + ".pkl")
+
+    try:
+        with open(path, "rb") as f:
+            return PlacementTable(*pickle.load(f))
+    except (OSError, pickle.UnpicklingError, EOFError, TypeError):
+        pass
+
+    table = build_table(tiles, rows, cols, board)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(tuple(getattr(table, name) for name in PlacementTable.__slots__), f)
+    os.replace(tmp, path)
+
+    return table
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    table = build_table()
+    print(f"built in {round(1000 * (time.perf_counter() - start), 2)} ms")
+
+    load_table()
+    start = time.perf_counter()
+    table = load_table()
+    print(f"loaded from cache in {round(1000 * (time.perf_counter() - start), 2)} ms")
+
+    for index, masks in enumerate(table.placements):
+        print(f"tile {index + 1}: {len(orientations(table.tiles[index]))} orientations, {len(masks)} placements")
@@ -1,7 +1,8 @@
 #https://i.redd.it/hfm2esfo9b171.jpg
 
 import numpy as np
-from collections import deque
+
+from regions import RegionPruner, grid_mask
 
 
 class Tile:
@@ -72,43 +73,19 @@ def check_contiguous(grid):
     # (since in that case, no tiles could fit), and second, that there is at least one contiguous 
     # empty region at least six tiles in size. The only 6-square tile is placed last, so unless 
     # the board is filled, there must be room for it.
-    
-    # algorithm: for each empty, unmarked square: mark it as visited, and traverse its empty, unmarked
-    # neighbors, until there are no more, counting each. 'empty' deque holds tuples of (xy, region)
-    # where 'region' is the identifier of the region that the square is a part of.
-
-    offsets = [np.array([-1, 0]), np.array([1, 0]), np.array([0, -1]), np.array([0, 1])]
-
-    regions = list() # list of integer region sizes
-    marked = list() # list of tuples, each an (x, y) point
-    empty = deque((xy, -1) for xy in np.argwhere(grid == 0))
-
-    while empty:
-        current = empty.popleft()
-
-        if tuple(current[0]) in marked: # only need to check if marked for squares w/o region (others checked below)
-            continue
-
-        marked.append(tuple(current[0]))
-
-        if current[1] == -1: # this is a new region
-            region_num = len(regions)
-            regions.append(1)
-
-        else: # we are just continuing to explore an existing region
-            region_num = current[1]
-            regions[current[1]] += 1
+    #
+    # The flood fill itself lives in regions.py, and works on a bitmask of the filled cells.
+    return RegionPruner().check(grid_mask(grid), 0)
 
-        for off in offsets:
-            new = current[0] + off
-            # verify that new square to check is within bounds, empty, and unmarked
-            if np.all(0 <= new) and np.all(new < 7) and not np.any(grid[new[0], new[1]]) and not tuple(new) in marked:
-                empty.appendleft((new, region_num))
 
-    return min(regions) >= 5 and max(regions) >= 6
+def solve_date(month, day, find_all=False, pruner=None, stats=None, cache=None):
+    # 'stats' is an optional stats.SearchStats, filled in as the search runs, and 'cache'
+    # an optional transposition.DeadEnds (ignored with find_all)
+    if find_all:
+        cache = None
+    if pruner is None:
+        pruner = RegionPruner()
 
-
-def solve_date(month, day, find_all=False):
     # Set up base grid
     month -= 1
     day -= 1
@@ -123,23 +100,47 @@ def solve_date(month, day, find_all=False):
 
     current_index = 0
     while 0 <= current_index < 8:
+        if stats is not None:
+            stats.tick(current_index)
+
         # Clear all points in the grid with the current index (+1)
         grid[grid == (current_index + 1)] = 0
 
         for (xy, o) in iterators[current_index]:
             shape = TRANSFORM[o] @ TILE[current_index].shape + xy.reshape(2,1)
+            in_bounds = np.all(0 <= shape) and np.all(shape < 7)
 
-            if np.all(0 <= shape) and np.all(shape < 7) and not np.any(grid[shape[0], shape[1]]):
+            if stats is not None:
+                stats.tried[current_index] += 1
+                if not in_bounds:
+                    stats.bounds[current_index] += 1
+                elif np.any(grid[shape[0], shape[1]]):
+                    stats.overlap[current_index] += 1
+
+            if in_bounds and not np.any(grid[shape[0], shape[1]]):
                 # all coords of transformed shape are within the grid and unoccupied (=> the shape fits)
                 current_index += 1
                 grid[shape[0], shape[1]] = current_index
 
                 if current_index < 8:
                     # another check: does placing this shape leave any un-fillable areas?
-                    # if so, remove it and continue searching this shape (instead of moving to the next)
-                    if not check_contiguous(grid):
+                    # if so, remove it and continue searching this shape (instead of moving to the next).
+                    # Only the regions next to the new tile can have changed since the last check.
+                    mask = grid_mask(grid == current_index)
+                    board = grid_mask(grid)
+                    if not pruner.check(board ^ mask, mask, parent_ok=current_index > 1):
+                        grid[grid == current_index] = 0
+                        current_index -= 1
+                        if stats is not None:
+                            stats.contiguous[current_index] += 1
+                        continue
+
+                    # has the search already failed from this board?
+                    if cache is not None and cache.seen(board, (1 << 8) - (1 << current_index)):
                         grid[grid == current_index] = 0
                         current_index -= 1
+                        if stats is not None:
+                            stats.cached[current_index] += 1
                         continue
 
                     # reset next iterator with new empty points
@@ -154,13 +155,22 @@ def solve_date(month, day, find_all=False):
                 break
 
         else: # tried all (xy, o) and none work
+            if stats is not None:
+                stats.backtracks[current_index] += 1
+            if cache is not None and current_index > 0:
+                cache.add(grid_mask(grid), (1 << 8) - (1 << current_index))
             current_index -= 1
 
+    if stats is not None:
+        stats.tick(current_index)
+
     return grid
 
 
 if __name__ == "__main__":
     import time
     start = time.perf_counter()
-    print(solve_date(1, 22))
+    pruner = RegionPruner()
+    print(solve_date(1, 22, pruner=pruner))
     print(time.perf_counter() - start)
+    print(pruner)
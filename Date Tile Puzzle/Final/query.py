@@ -0,0 +1,131 @@
+# Look up the solution for a date without running the batch job.
+#
+# Answers come from the binary store (store.py) that main.py builds, so a lookup is an
+# index read and a 25-byte decode. A date that isn't in the store yet is solved on the
+# spot and added to it, so it is only ever solved once. Dates with no solution aren't
+# stored (the store has no way to record them) and are solved again each time.
+#
+#   query.py today              today's solution
+#   query.py 5 29 --image       print it, and save both images through make_img
+#   query.py serve              answer "month day" / "today" lines from stdin until EOF
+
+import os
+import time
+import datetime
+
+import numpy as np
+
+from main import ENGINES
+from make_img import make_img
+from store import SolutionStore, write_store
+
+
+class Solutions:
+    def __init__(self, path="solutions.bin", engine="bitboard"):
+        # 'engine' is one of main.ENGINES, used for dates missing from the store. The
+        # default finds the same solutions as the batch run.
+        self.path = path
+        self.solve_date = ENGINES[engine]
+        self.store = SolutionStore(path) if os.path.exists(path) else None
+        self.grids = dict()  # grids already decoded, by date
+
+    def get(self, month, day):
+        # The date's grid, or None if it has no solution
+        date = (month, day)
+        if date in self.grids:
+            return self.grids[date]
+
+        grid = self.store.get(month, day) if self.store is not None else None
+        if grid is None:
+            grid = self.solve(month, day)
+
+        self.grids[date] = grid
+        return grid
+
+    def today(self):
+        today = datetime.date.today()
+        return today.month, today.day, self.get(today.month, today.day)
+
+    def solve(self, month, day):
+        grid = self.solve_date(month, day)
+        if 0 in grid:
+            return None
+
+        self.add(month, day, grid)
+        return grid
+
+    def add(self, month, day, grid):
+        # Rewrite the store with 'grid' added (atomically, see store.write_store)
+        solutions = {(month, day): [grid]}
+        if self.store is not None:
+            for date in self.store.dates():
+                solutions.setdefault(date, self.store.solutions(*date))
+            self.store.close()
+
+        write_store(self.path, solutions)
+        self.store = SolutionStore(self.path)
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def parse_date(text):
+    # "today", "month day" or "month-day" -> (month, day)
+    if text.strip() == "today":
+        today = datetime.date.today()
+        return today.month, today.day
+
+    month, day = map(int, text.replace("-", " ").split())
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        raise ValueError(f"no such date on the board: {text.strip()}")
+    return month, day
+
+
+def answer(solutions, month, day, image=False):
+    start = time.perf_counter()
+    grid = solutions.get(month, day)
+    elapsed = time.perf_counter() - start
+
+    if grid is None:
+        print(f"{month}-{day}: no solution ({round(elapsed * 1e6)} us)")
+        return
+
+    print(f"{month}-{day} ({round(elapsed * 1e6)} us)\n{np.asarray(grid)}")
+    if image:
+        make_img(grid, month, day)
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("date", nargs="*", default=["today"], help="'today', 'month day', or 'serve'")
+    parser.add_argument("--image", action="store_true", help="also save the images, as main.py does")
+    parser.add_argument("--store", default="solutions.bin")
+    parser.add_argument("--engine", choices=ENGINES, default="bitboard", help="solver for dates not in the store")
+    args = parser.parse_args()
+
+    with Solutions(args.store, args.engine) as solutions:
+        if args.date == ["serve"]:
+            for line in sys.stdin:
+                if not line.strip():
+                    continue
+                try:
+                    answer(solutions, *parse_date(line), image=args.image)
+                except ValueError as error:
+                    print(f"error: {error}")
+                sys.stdout.flush()
+        else:
+            try:
+                date = parse_date(" ".join(args.date))
+            except ValueError as error:
+                parser.error(str(error))
+            answer(solutions, *date, image=args.image)
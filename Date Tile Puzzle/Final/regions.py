@@ -0,0 +1,124 @@
+# Board masks and the empty-region pruning rule shared by the solvers.
+#
+# A board is a 49-bit integer, bit 7 * row + col set for each filled (or blocked) cell.
+# The pruning rule is the one puzzle.py has always used: after placing a tile, every
+# connected empty region must have at least five cells (the smallest tile), and at least
+# one must have six, since the 2x3 block is placed last. Solvers that place the tiles in
+# another order (ordering.py) lower that to the size of the largest tile still unplaced.
+
+ROWS = COLS = 7
+FULL = (1 << (ROWS * COLS)) - 1
+
+# Masks used to stop shifts from wrapping around the left and right edges
+NOT_LEFT = sum(1 << (r * COLS) for r in range(ROWS)) ^ FULL
+NOT_RIGHT = sum(1 << (r * COLS + COLS - 1) for r in range(ROWS)) ^ FULL
+
+
+def bit(row, col):
+    return 1 << (row * COLS + col)
+
+
+# Cells that are never part of the calendar
+BLOCKED = bit(0, 6) | bit(1, 6) | bit(6, 3) | bit(6, 4) | bit(6, 5) | bit(6, 6)
+
+
+def cells(mask):
+    # (row, col) of each set bit, in row-major order (the same order as np.argwhere)
+    while mask:
+        low = mask & -mask
+        index = low.bit_length() - 1
+        yield divmod(index, COLS)
+        mask ^= low
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def grid_mask(grid):
+    # Mask of the nonzero cells of a 7x7 grid
+    mask = 0
+    for index, value in enumerate(grid.flat):
+        if value:
+            mask |= 1 << index
+    return mask
+
+
+def neighbors(mask):
+    # Cells orthogonally adjacent to 'mask' (including 'mask' itself)
+    return (mask | (mask >> COLS) | (mask << COLS) | ((mask << 1) & NOT_LEFT) | ((mask >> 1) & NOT_RIGHT)) & FULL
+
+
+def fill(seed, empty):
+    # The connected region of 'empty' containing 'seed', grown a whole frontier at a time
+    region = seed
+    while True:
+        grown = neighbors(region) & empty
+        if grown == region:
+            return region
+        region = grown
+
+
+class RegionPruner:
+    # Applies the pruning rule, counting how often each part of it rejects a placement.
+    #
+    # When the board before the placement is known to have passed the check (every tile
+    # after the first), only the regions next to the new tile can have changed, so those
+    # are filled first; the untouched regions are only visited if none of the changed ones
+    # is big enough for the largest remaining tile.
+
+    __slots__ = ("checks", "too_small", "no_room", "cells_filled")
+
+    def __init__(self):
+        self.checks = 0
+        self.too_small = 0   # rejected because a region has fewer than 5 cells
+        self.no_room = 0     # rejected because no region has 6 cells
+        self.cells_filled = 0
+
+    def check(self, board, mask, parent_ok=False, room=6):
+        # Is placing 'mask' on 'board' allowed? 'board' must not already contain 'mask'.
+        # 'room' is the size of the largest tile still to be placed after this one.
+        self.checks += 1
+
+        empty = (board | mask) ^ FULL
+        touched = empty if not parent_ok else neighbors(mask) & empty
+        largest = 0
+
+        while touched:
+            region = fill(touched & -touched, empty)
+            size = popcount(region)
+            self.cells_filled += size
+
+            if size < 5:
+                self.too_small += 1
+                return False
+
+            largest = max(largest, size)
+            empty ^= region
+            touched &= ~region
+
+        # Any regions left in 'empty' were not changed by this placement
+        while largest < room and empty:
+            region = fill(empty & -empty, empty)
+            size = popcount(region)
+            self.cells_filled += size
+
+            largest = max(largest, size)
+            empty ^= region
+
+        if largest < room:
+            self.no_room += 1
+            return False
+
+        return True
+
+    @property
+    def pruned(self):
+        return self.too_small + self.no_room
+
+    def __str__(self):
+        return (
+            f"{self.checks} region checks, {self.pruned} pruned "
+            f"({self.too_small} region < 5, {self.no_room} no region >= 6), "
+            f"{self.cells_filled} cells flood-filled"
+        )
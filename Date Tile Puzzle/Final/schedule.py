@@ -0,0 +1,108 @@
+# Work scheduling for the batch run in main.py.
+#
+# Solve times differ by orders of magnitude between dates, so handing the dates to the pool
+# in calendar order leaves a few slow ones running alone at the end. Instead, dates are
+# ordered longest-first using the durations recorded by earlier runs (in the manifest and
+# in date_puzzle_log.txt), and fed to imap_unordered one at a time. The very slowest dates
+# can also be split into several tasks, each searching a contiguous slice of the first
+# tile's placements (see bitboard.solve_date); SplitResults puts the pieces back together.
+
+import re
+
+from batch import DONE
+
+
+# Whole dates only: the parts of split dates log "Processing of M-D (part i of n) ...",
+# which this doesn't match, since one part's time isn't the date's
+LOG_LINE = re.compile(r"Processing of (\d+)-(\d+) successful;.*?Duration ([\d.]+) sec")
+
+
+def load_timings(log_fp="date_puzzle_log.txt", manifest=None):
+    # {(month, day): seconds}. Later log lines override earlier ones, and the manifest's
+    # records override the log.
+    timings = dict()
+
+    try:
+        with open(log_fp) as log:
+            for line in log:
+                match = LOG_LINE.search(line)
+                if match:
+                    month, day, duration = match.groups()
+                    timings[(int(month), int(day))] = float(duration)
+    except FileNotFoundError:
+        pass
+
+    if manifest is not None:
+        for record in manifest.records.values():
+            if record["status"] in DONE:
+                timings[(record["month"], record["day"])] = record["duration"]
+
+    return timings
+
+
+def order_by_cost(dates, timings):
+    # Longest first. Dates that have never been timed go first, since they could be anything.
+    return sorted(dates, key=lambda date: -timings.get(date, float("inf")))
+
+
+def make_tasks(dates, timings, split=0, parts=4):
+    # List of (date, part) tasks in the order they should be started. 'part' is None, or
+    # (index, parts) for the 'split' slowest dates that have a recorded time.
+    ordered = order_by_cost(dates, timings)
+    slowest = set([date for date in ordered if date in timings][:split])
+
+    tasks = []
+    for date in ordered:
+        if date in slowest:
+            tasks.extend((date, (index, parts)) for index in range(parts))
+        else:
+            tasks.append((date, None))
+
+    return tasks
+
+
+class SplitResults:
+    # Collects the results of the parts of split dates. Parts search consecutive slices of
+    # the first tile's placements, in order, so the solution the unsplit search would find
+    # is the one from the lowest part that found any.
+
+    def __init__(self):
+        self.parts = dict()
+        self.finished = set()
+
+    def add(self, result):
+        # Returns the combined result once it is known, otherwise None (including for
+        # parts that arrive after their date has already been decided)
+        index, parts = result["part"]
+        date = (result["month"], result["day"])
+
+        if date in self.finished:
+            return None
+
+        done = self.parts.setdefault(date, [None] * parts)
+        done[index] = result
+
+        for part in done:
+            if part is None:
+                return None
+            if part["status"] != "no solution":
+                break
+
+        del self.parts[date]
+        self.finished.add(date)
+
+        combined = dict(part)
+        combined.pop("part")
+        combined["duration"] = round(sum(p["duration"] for p in done if p is not None), 2)
+        combined["log"] = [line for p in done if p is not None for line in p["log"]]
+
+        # the parts' lines are all labelled; this is the date's own, as an unsplit run logs it
+        month, day, duration = result["month"], result["day"], combined["duration"]
+        if combined["status"] == "error":
+            combined["log"].append(f"Error when processing {month}-{day} (duration {duration} sec). Continuing.\n")
+        elif combined["status"] == "no solution":
+            combined["log"].append(f"Processing of {month}-{day} successful; no solution found. Duration {duration} sec.\n")
+        else:
+            combined["log"].append(f"Processing of {month}-{day} successful; solution found. Duration {duration} sec. Proceeding to image generation.\n")
+
+        return combined
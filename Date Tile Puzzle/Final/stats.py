@@ -0,0 +1,83 @@
+# Optional instrumentation for the backtracking solvers (puzzle.py and bitboard.py).
+#
+# Pass a SearchStats as 'stats' to solve_date to count, for each tile index, how many
+# placements were tried and why they were rejected (off the board, overlapping another
+# tile, leaving a region that can't be filled, or reaching a board the transposition.py
+# cache knows is a dead end), how often the search backed up from
+# that tile, and how long was spent on it. When 'stats' is None the solvers skip all of
+# this, so leaving it off costs a few 'is None' checks.
+#
+# With 'interval' and 'callback' set, the callback is called with the stats object every
+# 'interval' seconds during the search, e.g. to log progress on a slow date.
+
+import time
+
+
+class SearchStats:
+    __slots__ = (
+        "tried", "bounds", "overlap", "contiguous", "cached", "backtracks", "seconds",
+        "current", "deepest", "interval", "callback", "_last", "_next_report", "_start"
+    )
+
+    def __init__(self, n_tiles=8, interval=None, callback=None):
+        self.tried = [0] * n_tiles
+        self.bounds = [0] * n_tiles       # rejected: not entirely on the board
+        self.overlap = [0] * n_tiles      # rejected: overlaps a tile or a blocked cell
+        self.contiguous = [0] * n_tiles   # rejected: leaves an empty region that can't be filled
+        self.cached = [0] * n_tiles       # rejected: leads to a known dead end
+        self.backtracks = [0] * n_tiles
+        self.seconds = [0.0] * n_tiles
+
+        self.current = 0  # tile index being placed
+        self.deepest = 0
+
+        self.interval = interval
+        self.callback = callback
+
+        self._start = self._last = time.perf_counter()
+        self._next_report = self._start + interval if interval else float("inf")
+
+    def tick(self, index):
+        # Called each time the search moves to tile 'index': charges the time since the
+        # last tick to the tile that was being placed, and reports progress when due
+        now = time.perf_counter()
+        self.seconds[self.current] += now - self._last
+        self._last = now
+
+        self.current = min(max(index, 0), len(self.tried) - 1)
+        self.deepest = max(self.deepest, self.current)
+
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            self.callback(self)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def snapshot(self):
+        # The counts as a plain dict, e.g. to send between processes
+        snapshot = {name: list(getattr(self, name)) for name in COUNTS}
+        snapshot.update(elapsed=self.elapsed, current=self.current, deepest=self.deepest)
+        return snapshot
+
+    def __str__(self):
+        return format_snapshot(self.snapshot())
+
+
+COUNTS = ("tried", "bounds", "overlap", "contiguous", "cached", "backtracks", "seconds")
+
+
+def format_snapshot(snapshot):
+    # The table str(SearchStats) prints, from a snapshot
+    lines = [f"{round(snapshot['elapsed'], 2)} sec, on tile {snapshot['current'] + 1} (deepest {snapshot['deepest'] + 1})"]
+    lines.append("tile      tried     bounds    overlap contiguous     cached backtracks    seconds")
+
+    for i, row in enumerate(zip(*(snapshot[name] for name in COUNTS))):
+        tried, bounds, overlap, contiguous, cached, backtracks, seconds = row
+        lines.append(
+            f"{i + 1:>4} {tried:>10} {bounds:>10} {overlap:>10} "
+            f"{contiguous:>10} {cached:>10} {backtracks:>10} {seconds:>10.2f}"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,162 @@
+# Binary solution store: every date's solutions in one small, indexed file.
+#
+# Each solution is stored as its 7x7 grid, one nibble per cell (-1 is stored as 0xF),
+# padded to 25 bytes. The file starts with a fixed index of 12 * 31 slots, one per
+# (month, day), holding the number of the date's first record and its record count, so
+# finding a date's solutions is a single lookup. SolutionStore reads the file through
+# mmap, so opening it is instant and only the records actually used are read from disk.
+#
+# Layout (little-endian):
+#   header   b"DTPS", uint16 version, uint16 slot count
+#   index    slot count x (uint32 first record, uint32 record count)
+#   records  25 bytes each
+
+import os
+import re
+import mmap
+import struct
+
+import numpy as np
+
+
+MAGIC = b"DTPS"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+SLOTS = 12 * 31
+CELLS = 49
+RECORD = (CELLS + 1) // 2
+
+
+def slot(month, day):
+    return (month - 1) * 31 + (day - 1)
+
+
+def pack(grids):
+    # (n, 7, 7) grids -> (n, RECORD) uint8 nibble records
+    flat = np.asarray(grids, dtype=np.int8).reshape(-1, CELLS).astype(np.uint8) & 0xF
+    flat = np.pad(flat, ((0, 0), (0, 2 * RECORD - CELLS)))
+    return (flat[:, 0::2] << 4) | flat[:, 1::2]
+
+
+def unpack(records):
+    # (n, RECORD) uint8 nibble records -> (n, 7, 7) int8 grids
+    records = np.asarray(records, dtype=np.uint8)
+    flat = np.empty((len(records), 2 * RECORD), dtype=np.int8)
+    flat[:, 0::2] = records >> 4
+    flat[:, 1::2] = records & 0xF
+    flat[flat == 0xF] = -1
+    return flat[:, :CELLS].reshape(-1, 7, 7)
+
+
+def write_store(path, solutions):
+    # 'solutions' maps (month, day) to a sequence of grids. Written atomically.
+    index = np.zeros((SLOTS, 2), dtype="<u4")
+    records = []
+    count = 0
+
+    for (month, day), grids in sorted(solutions.items()):
+        if len(grids) == 0:
+            continue
+
+        packed = pack(grids)
+        index[slot(month, day)] = (count, len(packed))
+        records.append(packed)
+        count += len(packed)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, SLOTS))
+        f.write(index.tobytes())
+        for packed in records:
+            f.write(packed.tobytes())
+    os.replace(tmp, path)
+
+
+class SolutionStore:
+    def __init__(self, path="solutions.bin"):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, slots = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION or slots != SLOTS:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} solution store")
+
+        self.index = np.frombuffer(self.map, dtype="<u4", count=2 * SLOTS, offset=HEADER.size).reshape(SLOTS, 2)
+        self.records = np.frombuffer(self.map, dtype=np.uint8, offset=HEADER.size + self.index.nbytes).reshape(-1, RECORD)
+
+    def count(self, month, day):
+        return int(self.index[slot(month, day), 1])
+
+    def solutions(self, month, day):
+        # All stored grids for the date, as an (n, 7, 7) int8 array
+        first, count = self.index[slot(month, day)]
+        return unpack(self.records[first:first + count])
+
+    def get(self, month, day):
+        # The first stored grid for the date, or None
+        first, count = self.index[slot(month, day)]
+        return unpack(self.records[first:first + 1])[0] if count else None
+
+    def dates(self):
+        return [(int(s) // 31 + 1, int(s) % 31 + 1) for s in np.flatnonzero(self.index[:, 1])]
+
+    def __contains__(self, date):
+        return self.count(*date) > 0
+
+    def close(self):
+        # The arrays viewing the map have to go before it can be closed
+        self.index = self.records = None
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+GRID_ENTRY = re.compile(r"(\d+)-(\d+)\n(\[\[.*?\]\])", re.S)
+
+
+def read_grid_data(path="grid_data.txt"):
+    # Parse the str(grid) blocks main.py used to append to grid_data.txt. Grids with empty
+    # cells (dates with no solution) are skipped; if a date appears more than once, the
+    # last entry wins.
+    with open(path) as f:
+        text = f.read()
+
+    solutions = dict()
+    for month, day, block in GRID_ENTRY.findall(text):
+        grid = np.array([row.split() for row in re.findall(r"\[([^\[\]]+)\]", block)], dtype=np.int8)
+
+        if grid.shape == (7, 7) and 0 not in grid:
+            solutions[(int(month), int(day))] = [grid]
+
+    return solutions
+
+
+def import_grid_data(txt_path="grid_data.txt", store_path="solutions.bin"):
+    solutions = read_grid_data(txt_path)
+    write_store(store_path, solutions)
+    return len(solutions)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # usage: store.py import [grid_data.txt] [solutions.bin]
+    #        store.py show month day [solutions.bin]
+    if len(sys.argv) > 1 and sys.argv[1] == "import":
+        print(f"imported {import_grid_data(*sys.argv[2:4])} dates")
+
+    elif len(sys.argv) > 3 and sys.argv[1] == "show":
+        with SolutionStore(*sys.argv[4:5]) as store:
+            grids = store.solutions(int(sys.argv[2]), int(sys.argv[3]))
+            print(f"{len(grids)} stored solution(s)")
+            for grid in grids:
+                print(grid)
+
+    else:
+        print("usage: store.py import [grid_data.txt] [solutions.bin] | show month day [solutions.bin]")
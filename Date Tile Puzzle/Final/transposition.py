@@ -0,0 +1,69 @@
+# Transposition cache of dead ends for the backtracking solvers.
+#
+# Placing the same tiles in a different order (or the same tiles in different places that
+# happen to fill the same cells) often leads to a board the search has already explored.
+# Once every way to continue from a board has failed, the solvers record it here, keyed on
+# (board mask, mask of the tiles still to place), and skip it when they reach it again.
+# Nothing about the key depends on the date (the month and day are just filled cells), so
+# one cache can be kept for a whole batch of dates.
+#
+# A dead end for one engine isn't necessarily one for another: puzzle.py and bitboard.py
+# never try one placement (see bitboard.candidates), so don't share a cache between them
+# and ordering.py. The least recently used entries are dropped beyond 'capacity'.
+
+from collections import OrderedDict
+
+
+class DeadEnds:
+    __slots__ = ("capacity", "entries", "lookups", "hits", "stores", "evictions")
+
+    def __init__(self, capacity=100_000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def seen(self, board, remaining):
+        # Is (board, remaining) a known dead end?
+        self.lookups += 1
+        key = (board, remaining)
+
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return True
+
+        return False
+
+    def add(self, board, remaining):
+        self.stores += 1
+        self.entries[(board, remaining)] = None
+        self.entries.move_to_end((board, remaining))
+
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.lookups} lookups, {self.hits} hits ({round(100 * self.hit_rate, 1)}%), "
+            f"{self.stores} dead ends stored, {self.evictions} evicted, {len(self)} cached"
+        )
+
+
+def tiles_mask(tiles):
+    # Mask of a collection of tile indices
+    mask = 0
+    for i in tiles:
+        mask |= 1 << i
+    return mask
@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from enum import IntEnum
 import time
 from typing import Tuple
-from game import Game, Tile
+from game import CompactGame, Tile
 from keybindings import KeyConfig
 
 
@@ -108,7 +108,7 @@ class Display:
         if not cont:
             return GameInfo(Result.QUIT, Next.MENU, False, 0)
             
-        self.game = Game((self.board_r, self.board_c), self.n_bombs, self.cursor)
+        self.game = CompactGame((self.board_r, self.board_c), self.n_bombs, self.cursor)
 
         for tile in pre_flagged:
             self.game.flag(tile)
@@ -1,3 +1,4 @@
+from collections import deque
 from enum import IntEnum
 from itertools import product
 import numpy as np
@@ -30,6 +31,9 @@ class Game:
     GEN_THRESH = int(1e4)
     MAX_SEARCH_DEPTH = 4
 
+    BOARD_DTYPE = int
+    DISP_DTYPE = int
+
     def __init__(self, shape: coord, n_bombs: int, first: coord):
         # with open("seed.pkl", "wb") as f:
         #     pickle.dump(random.getstate(), f)
@@ -67,9 +71,16 @@ class Game:
 
         self.total_bombs = n_bombs
         self.bombs_remaining = n_bombs
-        self.board = np.empty(shape=shape, dtype=int)
-        self.disp = np.full_like(self.board, Tile.HIDDEN, dtype=int)
+        self.board = np.empty(shape=shape, dtype=self.BOARD_DTYPE)
+        self.disp = np.full_like(self.board, Tile.HIDDEN, dtype=self.DISP_DTYPE)
+
+        self._place_bombs(first)
+        self._number()
+
+        # Reveal the tile selected
+        self.reveal(first)
 
+    def _place_bombs(self, first: Tuple[int, int]):
         # Generate bomb locations
         for _ in range(self.GEN_THRESH):  # try to find a 'vein'
             self.board[:, :] = Tile.EMPTY
@@ -100,6 +111,7 @@ class Game:
                     f"unable to generate bomb layout with selected number of bombs ({self.total_bombs})"
                 )
 
+    def _number(self):
         # Number the tiles
         for tile in product(range(self.board.shape[0]), range(self.board.shape[1])):
             if self.board[tile] != Tile.BOMB:
@@ -110,9 +122,6 @@ class Game:
 
                 self.board[tile] = total
 
-        # Reveal the tile selected
-        self.reveal(first)
-
     def adj(self, loc: coord, board: Optional[np.ndarray] = None) -> Generator[Tuple[int, int], None, None]:
         neighbors = (
             (-1, -1),
@@ -500,6 +509,178 @@ class Game:
             return (False, (branch1[1] & branch2[1]) | to_flag, (branch1[2] & branch2[2]) | to_clear)
 
 
+class CompactGame(Game):
+    """Game with the same interface and behavior, but stored for speed on large boards:
+      - board and disp are one byte per tile (board is int8, since Tile.BOMB is -1)
+      - every tile's neighbors are precomputed into a CSR-style table: the flat indices
+        of tile i's neighbors are neighbors[offsets[i]:offsets[i + 1]], in adj() order
+      - each tile's number of hidden and flagged neighbors is cached, and reveal() and
+        flag() update the counts, the reduced board, and the set of tiles with easy moves
+        for only the tiles around the ones they change
+    so reduce(), easy_moves() and check_win() no longer scan the whole board. Called with
+    a board (and disp, or a reduced board) of their own, they fall back to Game's versions.
+    """
+
+    BOARD_DTYPE = np.int8
+    DISP_DTYPE = np.uint8
+
+    def _number(self):
+        rows, cols = self.board.shape
+        n = rows * cols
+
+        # neighbor table, built from one shifted copy of the board per adj() offset
+        r, c = np.divmod(np.arange(n), cols)
+        found = []
+        for dr, dc in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)):
+            valid = (0 <= r + dr) & (r + dr < rows) & (0 <= c + dc) & (c + dc < cols)
+            found.append(np.where(valid, (r + dr) * cols + c + dc, -1))
+
+        table = np.stack(found, axis=1)  # (n, 8), -1 where there's no neighbor
+        self.degree = (table >= 0).sum(axis=1).astype(np.uint8)
+        self.offsets = np.concatenate(([0], np.cumsum(self.degree, dtype=np.intp)))
+        self.neighbors = table[table >= 0]
+
+        # number the tiles
+        bombs = self.board.ravel() == Tile.BOMB
+        owner = np.repeat(np.arange(n), self.degree)
+        counts = np.bincount(owner, weights=bombs[self.neighbors], minlength=n)
+        self.board.flat[~bombs] = counts[~bombs]
+
+        # everything starts hidden
+        self.hidden = self.degree.copy()
+        self.flagged = np.zeros(n, dtype=np.uint8)
+        self.reduced = np.full(self.board.shape, Tile.INACTIVE, dtype=np.int8)
+        self.easy = set()
+        self.unrevealed_safe = n - int(bombs.sum())
+        self.revealed_bombs = 0
+
+    def _adjacent(self, i: int) -> np.ndarray:
+        return self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+
+    def _index(self, loc: coord) -> int:
+        assert len(loc) == 2
+        if not (0 <= loc[0] < self.board.shape[0] and 0 <= loc[1] < self.board.shape[1]):
+            raise ValueError(
+                f"reveal location {loc} is not within board dimensions {self.board.shape}"
+            )
+        return int(loc[0]) * self.board.shape[1] + int(loc[1])
+
+    def _refresh(self, changed: Sequence[int]):
+        """Recompute the reduced board, and whether there's an easy move, for the changed
+        tiles and their neighbors (the only tiles whose reduced value can change)"""
+        tiles = np.unique(np.concatenate([changed] + [self._adjacent(i) for i in changed]))
+
+        disp = self.disp.ravel()[tiles]
+        board = self.board.ravel()[tiles].astype(np.int16)
+        hidden = self.hidden[tiles].astype(np.int16)
+        flagged = self.flagged[tiles].astype(np.int16)
+        revealed = self.degree[tiles] - hidden - flagged
+
+        # as in Game.reduce: the deficit of revealed tiles next to hidden ones, and the
+        # hidden tiles next to revealed ones
+        bomb_count = flagged + np.where(board == Tile.BOMB, revealed, 0)
+        values = np.select(
+            [disp == Tile.FLAGGED, (disp == Tile.REVEALED) & (hidden == 0), disp == Tile.REVEALED, revealed > 0],
+            [Tile.INACTIVE, Tile.INACTIVE, board - bomb_count, Tile.HIDDEN],
+            Tile.INACTIVE
+        )
+        self.reduced.flat[tiles] = values
+
+        # as in Game.easy_moves: a number with no deficit left, or as many hidden
+        # neighbors as its deficit
+        easy = (disp == Tile.REVEALED) & (hidden > 0) & (0 <= values) & (values <= 8) & ((values == 0) | (values == hidden))
+        for i, is_easy in zip(tiles.tolist(), easy.tolist()):
+            if is_easy:
+                self.easy.add(i)
+            else:
+                self.easy.discard(i)
+
+    def reveal(self, loc: coord, bomb_check: bool = True) -> bool:
+        i = self._index(loc)
+        loc = tuple(loc)
+
+        if self.disp.flat[i] != Tile.HIDDEN:
+            return False
+
+        if bomb_check and self.board.flat[i] == Tile.BOMB:
+            raise RuntimeError(f"bomb unexpectedly revealed at loc {loc}")
+
+        bomb_found = self.board.flat[i] == Tile.BOMB
+
+        # vein functionality: reveal all the hidden neighbors of empty tiles, breadth first
+        changed = [i]
+        self.disp.flat[i] = Tile.REVEALED
+        queue = deque(changed)
+        while queue:
+            j = queue.popleft()
+            self.hidden[self._adjacent(j)] -= 1
+
+            if self.board.flat[j] == Tile.BOMB:
+                self.revealed_bombs += 1
+            else:
+                self.unrevealed_safe -= 1
+
+            if self.board.flat[j] == Tile.EMPTY:
+                for k in self._adjacent(j).tolist():
+                    if self.disp.flat[k] == Tile.HIDDEN:
+                        self.disp.flat[k] = Tile.REVEALED
+                        changed.append(k)
+                        queue.append(k)
+
+        self._refresh(changed)
+        return bool(bomb_found)
+
+    def flag(self, loc: coord):
+        i = self._index(loc)
+
+        if self.disp.flat[i] == Tile.HIDDEN:
+            self.disp.flat[i] = Tile.FLAGGED
+            self.bombs_remaining -= 1
+            self.hidden[self._adjacent(i)] -= 1
+            self.flagged[self._adjacent(i)] += 1
+
+        elif self.disp.flat[i] == Tile.FLAGGED:
+            self.disp.flat[i] = Tile.HIDDEN
+            self.bombs_remaining += 1
+            self.hidden[self._adjacent(i)] += 1
+            self.flagged[self._adjacent(i)] -= 1
+
+        else:
+            return
+
+        self._refresh([i])
+
+    def check_win(self, board: Optional[np.ndarray] = None, disp: Optional[np.ndarray] = None) -> bool:
+        if board is not None or disp is not None:
+            return super().check_win(board, disp)
+
+        # the player has won if all non-bomb tiles have been revealed
+        return self.unrevealed_safe == 0 and self.revealed_bombs == 0
+
+    def reduce(self, board: Optional[np.ndarray] = None, disp: Optional[np.ndarray] = None) -> np.ndarray:
+        if board is not None or disp is not None:
+            return super().reduce(board, disp)
+
+        return self.reduced.copy()
+
+    def easy_moves(self, reduced: Optional[np.ndarray] = None) -> Generator[move, None, None]:
+        if reduced is not None:
+            yield from super().easy_moves(reduced)
+            return
+
+        # collected up front, so the moves all come from the board as it is now (as with
+        # Game's, which works from a reduced copy) even if they're played as they're yielded
+        cols = self.board.shape[1]
+        moves = []
+        for i in sorted(self.easy):
+            kind = Tile.REVEALED if self.reduced.flat[i] == 0 else Tile.FLAGGED
+            for j in self._adjacent(i).tolist():
+                if self.disp.flat[j] == Tile.HIDDEN:
+                    moves.append(((j // cols, j % cols), kind))
+
+        yield from moves
+
+
 
 if __name__ == "__main__":
     g = Game((9, 9), 10, (4, 4))